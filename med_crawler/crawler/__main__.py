@@ -2,11 +2,70 @@
 
 # Standard library imports
 import argparse
+import contextlib
 import datetime
+import os
+from pathlib import Path
+import sys
+from enum import Enum
+from typing import TextIO
 
 # Local library imports
 from med_crawler.crawler import Crawler, LAST_MED_ENTRY_ID
-from med_crawler.log import CrawlerLogger
+from med_crawler.crawler.archive import ArchiveSink, trim_archive
+from med_crawler.crawler.checkpoint import Checkpoint
+from med_crawler.crawler.freshness import Freshness
+from med_crawler.crawler.idspace import IdSpace
+from med_crawler.crawler.merge import (
+    merge_archives,
+    merge_dirs,
+    merge_json,
+    merge_records,
+    merge_sqlite,
+    merge_text,
+)
+from med_crawler.crawler.metrics import Metrics
+from med_crawler.crawler.ratelimit import TokenBucket
+from med_crawler.crawler.records import RecordSink
+from med_crawler.crawler.retry import DeadLetter, RetryPolicy, read_ids
+from med_crawler.crawler.shard import Shard, ShardException
+from med_crawler.crawler.stats import CrawlStats, iter_events
+from med_crawler.crawler.sink import DirectorySink, Sink
+from med_crawler.crawler.transport import TransportKind, make_transport
+from med_crawler.log import JsonLogger, Logger, QueueLogger
+from med_crawler.parser.writer import JsonEntryWriter, SqliteEntryWriter
+from med_crawler.pipeline import ParsingSink
+
+
+class OutputFormat(str, Enum):
+    """Supported crawler output formats."""
+
+    TEXT = "text"
+    DIR = "dir"
+    JSON = "json"
+    SQLITE = "sqlite"
+    WARC = "warc"
+    RECORDS = "records"
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class LogFormat(str, Enum):
+    """Supported crawler log formats."""
+
+    TEXT = "text"
+    JSON = "json"
+
+    def __str__(self) -> str:
+        return self.name
+
+
+def shard_arg(value: str) -> Shard:
+    try:
+        return Shard.parse(value)
+    except ShardException as err:
+        raise argparse.ArgumentTypeError(str(err)) from err
 
 
 def get_args() -> argparse.Namespace:
@@ -19,17 +78,48 @@ def get_args() -> argparse.Namespace:
     parser.add_argument(
         "-o",
         "--output",
-        help="output file",
+        help="output file, or directory with --format dir",
         default="-",
-        type=argparse.FileType("w"),
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        help="output format",
+        choices=[str(fmt).lower() for fmt in OutputFormat],
+        type=lambda x: OutputFormat(x.lower()),
+        default=OutputFormat.TEXT,
+    )
+    parser.add_argument(
+        "--fragment",
+        help="store only the <entryfree> element of each page",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--compress",
+        help="gzip entry files written with --format dir",
+        action="store_true",
     )
     parser.add_argument(
         "--last-id",
-        help="last MED entry ID",
+        help=(
+            "last MED entry ID (default: last discovered with --id-space, "
+            f"else {LAST_MED_ENTRY_ID})"
+        ),
         type=int,
-        default=LAST_MED_ENTRY_ID,
+        default=None,
         required=False,
     )
+    parser.add_argument(
+        "--id-space",
+        help="file keeping 404 gaps and the last discovered entry ID",
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--discover",
+        help="probe MED for its last entry ID before crawling",
+        action="store_true",
+    )
     date_fmt = "%Y%m%dT%H%M%S"
     time = datetime.datetime.now().strftime(date_fmt)
     parser.add_argument(
@@ -39,25 +129,334 @@ def get_args() -> argparse.Namespace:
         default=f"med-crawl.{time}.log",
         type=argparse.FileType("w"),
     )
+    parser.add_argument(
+        "--log-format",
+        help="log format; json logs can be analysed with med-crawl-stats",
+        choices=[str(fmt).lower() for fmt in LogFormat],
+        type=lambda x: LogFormat(x.lower()),
+        default=LogFormat.TEXT,
+    )
     parser.add_argument(
         "--requests",
-        help="N concurrent requests",
+        help="N concurrent requests to start with",
         type=int,
         default=5,
         required=False,
     )
+    parser.add_argument(
+        "--max-requests",
+        help="upper bound on adaptive concurrent requests",
+        type=int,
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--transport",
+        help="HTTP transport; auto prefers aiohttp when it is installed",
+        choices=[str(kind) for kind in TransportKind],
+        type=lambda x: TransportKind(x.lower()),
+        default=TransportKind.AUTO,
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="checkpoint file with crawled IDs (default: OUTPUT.checkpoint)",
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--resume",
+        help="append to output and crawl only IDs missing from checkpoint",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--incremental",
+        help="state file with ETag/Last-Modified/hash per ID; skip unchanged",
+        metavar="STATE",
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--budget-requests",
+        help="crawl at most N entries, stalest first with --incremental",
+        type=int,
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--budget-time",
+        help="stop issuing requests after N seconds",
+        type=float,
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--retries",
+        help="retries per entry on timeouts, resets, 429 and 5xx",
+        type=int,
+        default=RetryPolicy().attempts - 1,
+        required=False,
+    )
+    parser.add_argument(
+        "--dead-letter",
+        help="file for IDs that failed for good (default: OUTPUT.dead)",
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--ids",
+        help="crawl only the IDs listed in a file, e.g. a dead-letter file",
+        type=argparse.FileType("r"),
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--shard",
+        help=(
+            "crawl only shard k of N (k from 1 to N); --requests, "
+            "--max-requests and --rate without --rate-file are then shared "
+            "by all N shards"
+        ),
+        metavar="k/N",
+        type=shard_arg,
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--rate",
+        help="send at most R requests per second (default: no limit)",
+        metavar="R",
+        type=float,
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--burst",
+        help="let up to N requests through at once within --rate",
+        metavar="N",
+        type=int,
+        default=1,
+        required=False,
+    )
+    parser.add_argument(
+        "--rate-file",
+        help="file holding a --rate budget shared by crawlers on this host",
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--metrics",
+        help="Prometheus text file with live crawl metrics",
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        help="seconds between rewrites of the --metrics file",
+        type=float,
+        default=5.0,
+        required=False,
+    )
+    parser.add_argument(
+        "--summary",
+        help="JSON file with a summary of crawl metrics written at the end",
+        default=None,
+        required=False,
+    )
     result = parser.parse_args()
+    if result.dead_letter is None and result.output != "-":
+        result.dead_letter = f"{result.output}.dead"
+    if result.checkpoint is None and result.output != "-":
+        result.checkpoint = f"{result.output}.checkpoint"
+    if result.rate is not None and result.rate <= 0:
+        parser.error("--rate must be positive")
+    if result.rate_file is not None and result.rate is None:
+        parser.error("--rate-file requires --rate")
+    if result.resume and result.checkpoint is None:
+        parser.error("--resume requires --checkpoint or a file --output")
+    if result.incremental is not None and result.format not in (
+        OutputFormat.DIR,
+        OutputFormat.WARC,
+        OutputFormat.RECORDS,
+    ):
+        # Unchanged entries are not written again, so the output has to
+        # keep those of earlier runs.
+        parser.error("--incremental requires --format dir, warc or records")
+    match result.format:
+        case OutputFormat.TEXT:
+            try:
+                mode = "a" if result.resume else "w"
+                result.output = argparse.FileType(mode)(result.output)
+            except argparse.ArgumentTypeError as err:
+                parser.error(str(err))
+        case OutputFormat.JSON if result.resume:
+            parser.error("--resume cannot append to a JSON array")
+        case (
+            OutputFormat.DIR
+            | OutputFormat.SQLITE
+            | OutputFormat.WARC
+            | OutputFormat.RECORDS
+        ) if result.output == "-":
+            parser.error(f"--format {result.format.value} requires a path")
     return result
 
 
+def open_sink(args: argparse.Namespace, logger: Logger) -> TextIO | Sink:
+    # A delta pass only writes what changed, on top of the last snapshot.
+    append = args.resume or args.incremental is not None
+    match args.format:
+        case OutputFormat.DIR:
+            return DirectorySink(args.output, compress=args.compress)
+        case OutputFormat.JSON:
+            out = sys.stdout if args.output == "-" else open(args.output, "w")
+            return ParsingSink(JsonEntryWriter(out), logger=logger)
+        case OutputFormat.SQLITE:
+            return ParsingSink(SqliteEntryWriter(args.output), logger=logger)
+        case OutputFormat.WARC:
+            if append:
+                trim_archive(args.output)
+                return ArchiveSink(open(args.output, "ab"))
+            return ArchiveSink(open(args.output, "wb"))
+        case OutputFormat.RECORDS:
+            return RecordSink(args.output, append=append)
+        case _:
+            return args.output
+
+
 def crawl(args: argparse.Namespace) -> None:
-    c = Crawler(
-        output=args.output,
-        logger=CrawlerLogger(args.log, include_date=True),
-        last_entry_id=args.last_id,
-        concurrent_requests=args.requests,
+    requests = args.requests
+    max_requests = args.max_requests or 4 * args.requests
+    if args.shard is not None:
+        requests = args.shard.budget(requests)
+        max_requests = args.shard.budget(max_requests)
+    with contextlib.ExitStack() as stack:
+        if args.log_format == LogFormat.JSON:
+            logger: QueueLogger = JsonLogger(args.log)
+        else:
+            logger = QueueLogger(args.log, include_date=True)
+        stack.enter_context(logger)
+        output = open_sink(args, logger)
+        checkpoint = None
+        if args.checkpoint is not None:
+            checkpoint = stack.enter_context(
+                Checkpoint(args.checkpoint, follows=[output])
+            )
+            if not args.resume:
+                checkpoint.clear()
+        freshness = None
+        if args.incremental is not None:
+            freshness = stack.enter_context(Freshness(args.incremental))
+        ids = None
+        if args.ids is not None:
+            ids = list(read_ids(stack.enter_context(args.ids)))
+        idspace = None
+        if args.id_space is not None:
+            idspace = stack.enter_context(IdSpace(args.id_space))
+        last_id = args.last_id
+        if last_id is None and idspace is not None:
+            last_id = idspace.last_id
+        rate_limit = None
+        if args.rate is not None:
+            rate = args.rate
+            if args.shard is not None and args.rate_file is None:
+                rate /= args.shard.count
+            rate_limit = stack.enter_context(
+                TokenBucket(rate, args.burst, args.rate_file)
+            )
+        dead_letter = None
+        if args.dead_letter is not None:
+            dead_letter = DeadLetter(
+                stack.enter_context(open(args.dead_letter, "w"))
+            )
+        c = Crawler(
+            output=output,
+            logger=logger,
+            last_entry_id=last_id or LAST_MED_ENTRY_ID,
+            concurrent_requests=requests,
+            max_concurrent_requests=max_requests,
+            transport=make_transport(args.transport, pool_size=max_requests),
+            checkpoint=checkpoint,
+            freshness=freshness,
+            request_budget=args.budget_requests,
+            time_budget=args.budget_time,
+            retry=RetryPolicy(attempts=args.retries + 1),
+            dead_letter=dead_letter,
+            ids=ids,
+            idspace=idspace,
+            shard=args.shard,
+            metrics=Metrics(
+                args.metrics, args.summary, interval=args.metrics_interval
+            ),
+            rate_limit=rate_limit,
+            fragment=args.fragment,
+        )
+        if isinstance(output, ParsingSink):
+            # The checkpoint holds pages back until parsed; a failed parse
+            # marks them failed.
+            output.on_failure = c.fail
+        if args.discover:
+            c.discover()
+        c.crawl(args.verbose)
+
+
+def get_merge_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Med-crawl-merge - Merge outputs of sharded MED crawls"
+    )
+    parser.add_argument(
+        "inputs",
+        help="shard outputs, in shard order",
+        nargs="+",
     )
-    c.crawl(args.verbose)
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="merged output file or directory",
+        required=True,
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        help="format the shards were crawled with",
+        choices=[str(fmt).lower() for fmt in OutputFormat],
+        type=lambda x: OutputFormat(x.lower()),
+        default=OutputFormat.TEXT,
+    )
+    result = parser.parse_args()
+    return result
+
+
+def merge(args: argparse.Namespace) -> None:
+    match args.format:
+        case OutputFormat.TEXT:
+            with open(args.output, "w") as f:
+                merge_text(args.inputs, f)
+        case OutputFormat.DIR:
+            merge_dirs(args.inputs, args.output)
+        case OutputFormat.JSON:
+            with open(args.output, "w") as f:
+                merge_json(args.inputs, f)
+        case OutputFormat.SQLITE:
+            merge_sqlite(args.inputs, args.output)
+        case OutputFormat.WARC:
+            with open(args.output, "wb") as b:
+                merge_archives(args.inputs, b)
+        case OutputFormat.RECORDS:
+            merge_records(args.inputs, args.output)
+    output = Path(args.output)
+    if checkpoints := sidecars(args.inputs, ".checkpoint"):
+        with Checkpoint(f"{output}.checkpoint") as checkpoint:
+            checkpoint.clear()
+            for path in checkpoints:
+                checkpoint.merge(path)
+    if dead_letters := sidecars(args.inputs, ".dead"):
+        with open(f"{output}.dead", "w") as f:
+            merge_text(dead_letters, f)
+
+
+def sidecars(inputs: list[str], suffix: str) -> list[str]:
+    """Return existing checkpoint or dead-letter files next to inputs."""
+    paths = [f"{Path(path)}{suffix}" for path in inputs]
+    return [path for path in paths if os.path.exists(path)]
 
 
 def main() -> None:
@@ -65,5 +464,62 @@ def main() -> None:
     crawl(args)
 
 
+def merge_main() -> None:
+    args = get_merge_args()
+    merge(args)
+
+
+def get_stats_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Med-crawl-stats - Summarise a med-crawl JSON log"
+    )
+    parser.add_argument(
+        "log",
+        help="log written with med-crawl --log-format json; - for stdin",
+        type=argparse.FileType("r"),
+    )
+    parser.add_argument(
+        "-i",
+        "--interval",
+        help="seconds per line of throughput over time",
+        type=float,
+        default=60.0,
+    )
+    parser.add_argument(
+        "--failed",
+        help="write IDs to crawl again here, ready for med-crawl --ids",
+        type=argparse.FileType("w"),
+        default=None,
+    )
+    result = parser.parse_args()
+    if result.interval <= 0:
+        parser.error("--interval must be positive")
+    return result
+
+
+def stats(args: argparse.Namespace, out: TextIO = sys.stdout) -> None:
+    s = CrawlStats(args.interval)
+    with args.log as f:
+        for event in iter_events(f):
+            if window := s.feed(event):
+                out.write(f"{window}\n")
+    if window := s.finish():
+        out.write(f"{window}\n")
+    s.report(out)
+    if args.failed is not None:
+        with args.failed as f:
+            dead_letter = DeadLetter(f)
+            for id, reason in sorted(s.failed.items()):
+                dead_letter.put(id, reason)
+    else:
+        for id, reason in sorted(s.failed.items()):
+            out.write(f"{id}\t{reason}\n")
+
+
+def stats_main() -> None:
+    args = get_stats_args()
+    stats(args)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,189 @@
+"""Compressed WARC-style archive of crawled MED entry pages.
+
+Every response is stored as its own gzip member holding a block of
+`Name: value` header lines, a blank line and the page body, the way
+`.warc.gz` files do it. Members can be appended to and read back one at a
+time, and `zcat` shows the whole archive as plain text.
+"""
+
+# Standard library imports
+from __future__ import annotations
+import asyncio
+from collections import deque
+import concurrent.futures
+from dataclasses import dataclass
+import datetime
+import gzip
+import hashlib
+import os
+from pathlib import Path
+from typing import BinaryIO, Iterator
+import zlib
+
+# Local library imports
+from med_crawler.crawler.transport import WebContents
+
+
+__all__ = ["ArchiveRecord", "ArchiveSink", "iter_archive", "trim_archive"]
+
+
+VERSION = b"MEDARC/1.0"
+
+
+class ArchiveException(Exception):
+    ...
+
+
+@dataclass(slots=True, frozen=True)
+class ArchiveRecord:
+    id: int
+    status_code: int
+    fetched: str
+    digest: str
+    text: str
+    offset: int = 0
+
+
+def encode_record(id: int, contents: WebContents, fetched: str) -> bytes:
+    body = contents.text.encode("utf-8")
+    digest = "sha256:" + hashlib.sha256(body).hexdigest()
+    head = (
+        f"MED-ID: {id}\r\n"
+        f"Status: {contents.status_code}\r\n"
+        f"Date: {fetched}\r\n"
+        f"Digest: {digest}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+    ).encode("ascii")
+    return gzip.compress(
+        VERSION + b"\r\n" + head + b"\r\n" + body + b"\r\n", mtime=0
+    )
+
+
+def decode_record(data: bytes, offset: int = 0) -> ArchiveRecord:
+    head, sep, rest = data.partition(b"\r\n\r\n")
+    if not sep:
+        raise ArchiveException(f"truncated record at offset {offset}")
+    version, *lines = head.decode("ascii").split("\r\n")
+    if version.encode("ascii") != VERSION:
+        raise ArchiveException(f"unknown record version {version!r}")
+    headers = dict(line.split(": ", 1) for line in lines)
+    length = int(headers["Content-Length"])
+    return ArchiveRecord(
+        id=int(headers["MED-ID"]),
+        status_code=int(headers["Status"]),
+        fetched=headers["Date"],
+        digest=headers["Digest"],
+        text=rest[:length].decode("utf-8"),
+        offset=offset,
+    )
+
+
+class ArchiveSink:
+    """Crawler sink appending compressed records to a binary file.
+
+    Compression runs on a thread pool so that it stays off the event loop;
+    records are written in the order pages arrived.
+    """
+
+    def __init__(
+        self, out: BinaryIO, workers: int = 2, max_pending: int = 16
+    ) -> None:
+        self.out = out
+        self.max_pending = max_pending
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers)
+        self.pending: deque[concurrent.futures.Future[bytes]] = deque()
+
+    def put(self, id: int, contents: WebContents) -> None:
+        self._harvest()
+        fetched = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self.pending.append(
+            self.executor.submit(encode_record, id, contents, fetched)
+        )
+
+    async def drain(self) -> None:
+        while len(self.pending) >= self.max_pending:
+            await asyncio.wrap_future(self.pending[0])
+            self._harvest()
+
+    def flush(self) -> None:
+        concurrent.futures.wait(self.pending)
+        self._harvest()
+        self.out.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.executor.shutdown()
+        self.out.close()
+
+    def _harvest(self) -> None:
+        while self.pending and self.pending[0].done():
+            self.out.write(self.pending.popleft().result())
+
+
+def iter_members(
+    f: BinaryIO, chunk_size: int = 1 << 16
+) -> Iterator[tuple[int, int, bytes]]:
+    """Yield the offset, size and content of each gzip member of `f`."""
+    offset, buffer = 0, b""
+    while True:
+        if not buffer:
+            buffer = f.read(chunk_size)
+            if not buffer:
+                return
+        decompressor = zlib.decompressobj(wbits=31)
+        data, consumed = [], 0
+        while not decompressor.eof:
+            if not buffer:
+                buffer = f.read(chunk_size)
+                if not buffer:
+                    raise ArchiveException(
+                        f"truncated record at offset {offset}"
+                    )
+            try:
+                data.append(decompressor.decompress(buffer))
+            except zlib.error as err:
+                raise ArchiveException(
+                    f"corrupt record at offset {offset}: {err}"
+                ) from err
+            consumed += len(buffer)
+            buffer = decompressor.unused_data
+            consumed -= len(buffer)
+        yield offset, consumed, b"".join(data)
+        offset += consumed
+
+
+def iter_archive(
+    path: str | Path, chunk_size: int = 1 << 16, latest: bool = False
+) -> Iterator[ArchiveRecord]:
+    """Yield records one gzip member at a time with their byte offsets.
+
+    With `latest` set, records superseded by a later one of the same ID
+    are skipped, at the cost of a first pass over the archive.
+    """
+    current = None
+    if latest:
+        last = {r.id: r.offset for r in iter_archive(path, chunk_size)}
+        current = set(last.values())
+    with open(path, "rb") as f:
+        for offset, _, data in iter_members(f, chunk_size):
+            if current is None or offset in current:
+                yield decode_record(data, offset)
+
+
+def trim_archive(path: str | Path) -> int:
+    """Cut a record left incomplete by a crash off the end of an archive.
+
+    Returns the size of the archive after the last complete record, or 0
+    if there is no archive. The whole archive is read to find it.
+    """
+    if not os.path.exists(path):
+        return 0
+    end = 0
+    with open(path, "r+b") as f:
+        try:
+            for offset, size, data in iter_members(f):
+                decode_record(data, offset)
+                end = offset + size
+        except ArchiveException:
+            f.truncate(end)
+    return end
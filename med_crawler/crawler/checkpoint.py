@@ -0,0 +1,146 @@
+"""Persistent record of crawled MED entry IDs for resumable crawls."""
+
+# Standard library imports
+from __future__ import annotations
+import enum
+import sqlite3
+import time
+from typing import Iterable, Iterator, Protocol, runtime_checkable
+
+
+__all__ = ["Checkpoint", "CheckpointException", "EntryStatus"]
+
+
+class CheckpointException(Exception):
+    """CheckpointException"""
+
+
+class SupportsFlush(Protocol):
+    def flush(self) -> None:
+        raise NotImplementedError
+
+
+@runtime_checkable
+class SupportsUnwritten(Protocol):
+    def unwritten(self) -> set[int]:
+        raise NotImplementedError
+
+
+class EntryStatus(str, enum.Enum):
+    ok = OK = "ok"
+    missing = MISSING = "missing"
+    failed = FAILED = "failed"
+
+    @classmethod
+    def from_status_code(cls, status_code: int | None) -> EntryStatus:
+        match status_code:
+            case 200 | 304:
+                return cls.OK
+            case 404:
+                return cls.MISSING
+            case _:
+                return cls.FAILED
+
+
+class Checkpoint:
+    """SQLite table of entry IDs with the outcome of their last fetch.
+
+    Outcomes are buffered and committed at most every `flush_interval`
+    seconds, so a killed crawl loses no more than that much progress.
+    Files passed as `follows` are flushed first so that an ID is never
+    committed before the data written for it. IDs a follow still reports
+    as `unwritten`, such as pages waiting for a parser, are held back
+    until a later flush.
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        flush_interval: float = 1.0,
+        follows: Iterable[SupportsFlush] = (),
+    ) -> None:
+        self.file_name = file_name
+        self.flush_interval = flush_interval
+        self.follows = list(follows)
+        self._buffer: list[tuple[int, str, int | None, float]] = []
+        self._last_flush = time.monotonic()
+
+    def __enter__(self) -> Checkpoint:
+        try:
+            self.conn = sqlite3.connect(self.file_name)
+            self.conn.execute("PRAGMA journal_mode=WAL;")
+            self.conn.execute("PRAGMA synchronous=NORMAL;")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS checkpoint (
+                    id INTEGER PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    status_code INTEGER NULL,
+                    updated REAL NOT NULL
+                );
+                """
+            )
+            self.conn.commit()
+        except sqlite3.Error as err:
+            raise CheckpointException(err) from err
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback) -> None:
+        self.flush()
+        self.conn.close()
+
+    def record(self, id: int, status_code: int | None) -> None:
+        status = EntryStatus.from_status_code(status_code)
+        self._buffer.append((id, status.value, status_code, time.time()))
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        held: set[int] = set()
+        for f in self.follows:
+            f.flush()
+            if isinstance(f, SupportsUnwritten):
+                held |= f.unwritten()
+        ready = [row for row in self._buffer if row[0] not in held]
+        self._buffer = [row for row in self._buffer if row[0] in held]
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO checkpoint "
+            "(id, status, status_code, updated) VALUES (?, ?, ?, ?);",
+            ready,
+        )
+        self.conn.commit()
+
+    def clear(self) -> None:
+        self._buffer.clear()
+        self.conn.execute("DELETE FROM checkpoint;")
+        self.conn.commit()
+
+    def merge(self, file_name: str) -> None:
+        """Take over the entries of another checkpoint file."""
+        self.flush()
+        self.conn.execute("ATTACH DATABASE ? AS other;", (file_name,))
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoint "
+                "SELECT * FROM other.checkpoint;"
+            )
+            self.conn.commit()
+        finally:
+            self.conn.execute("DETACH DATABASE other;")
+
+    def ids(self, *statuses: EntryStatus) -> set[int]:
+        self.flush()
+        marks = ", ".join("?" for _ in statuses)
+        cur = self.conn.execute(
+            f"SELECT id FROM checkpoint WHERE status IN ({marks});",
+            [s.value for s in statuses],
+        )
+        return {row[0] for row in cur}
+
+    def pending(self, ids: Iterable[int]) -> Iterator[int]:
+        """Yield IDs that have neither been crawled nor found missing."""
+        done = self.ids(EntryStatus.OK, EntryStatus.MISSING)
+        return (id for id in ids if id not in done)
@@ -0,0 +1,111 @@
+"""Adaptive concurrency control for the crawler."""
+
+# Standard library imports
+from __future__ import annotations
+import asyncio
+from collections import deque
+import math
+
+
+__all__ = ["AdaptiveLimiter"]
+
+
+class AdaptiveLimiter:
+    """Additive-increase/multiplicative-decrease limit on in-flight requests.
+
+    The limit grows by `increase` after every window of `limit` healthy
+    responses and shrinks by `decrease` on 429, 5xx, transport errors or
+    when the p95 latency since the last change drifts `latency_factor`
+    times above the best p95 seen so far (latencies under `latency_floor`
+    seconds always count as healthy). The limit is changed at most once per
+    window so that a burst of failures from the same window only counts
+    once.
+    """
+
+    def __init__(
+        self,
+        initial: int = 5,
+        minimum: int = 1,
+        maximum: int = 20,
+        increase: int = 1,
+        decrease: float = 0.5,
+        latency_window: int = 100,
+        latency_factor: float = 2.0,
+        latency_floor: float = 0.05,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.latency_floor = latency_floor
+        self.latencies: deque[float] = deque(maxlen=latency_window)
+        self.baseline_p95: float | None = None
+        self.in_flight = 0
+        self._since_change = 0
+        self._backed_off = False
+        self._condition: asyncio.Condition | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        # Created lazily to bind to the loop that runs the crawl.
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+        return self._condition
+
+    async def acquire(self) -> None:
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self, latency: float, status_code: int | None) -> None:
+        async with self.condition:
+            self.in_flight -= 1
+            self.record(latency, status_code)
+            self.condition.notify_all()
+
+    def record(self, latency: float, status_code: int | None) -> None:
+        """Feed the outcome of a single request into the controller.
+
+        A status code of None stands for a request that raised.
+        """
+        self._since_change += 1
+        if status_code is None or status_code == 429 or status_code >= 500:
+            self._backoff()
+            return
+        self.latencies.append(latency)
+        if self._since_change < self.limit:
+            return
+        p95 = self.p95()
+        if self.baseline_p95 is None or p95 < self.baseline_p95:
+            self.baseline_p95 = p95
+        threshold = self.baseline_p95 * self.latency_factor
+        if p95 > max(threshold, self.latency_floor):
+            self._backoff()
+        else:
+            self._backed_off = False
+            self._set_limit(self.limit + self.increase)
+
+    def p95(self) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[math.ceil(0.95 * len(ordered)) - 1]
+
+    def _backoff(self) -> None:
+        # Responses already in flight when the limit dropped say nothing
+        # about the new limit, so wait a full window before backing off again.
+        if self._backed_off and self._since_change < self.limit:
+            return
+        self._backed_off = True
+        self._set_limit(math.floor(self.limit * self.decrease))
+
+    def _set_limit(self, limit: int) -> None:
+        self.limit = min(max(limit, self.minimum), self.maximum)
+        self._since_change = 0
+        # Latencies under the old limit would judge the new one.
+        self.latencies.clear()
@@ -3,9 +3,18 @@
 # Standard library imports
 from __future__ import annotations
 import asyncio
-from dataclasses import dataclass
-import requests
-from typing import Any, ClassVar, Coroutine, TextIO, TYPE_CHECKING
+from dataclasses import dataclass, replace
+import itertools
+import signal
+import time
+from typing import (
+    Iterable,
+    Iterator,
+    Mapping,
+    Sized,
+    TextIO,
+    TYPE_CHECKING,
+)
 import urllib.parse
 
 # Third-party library imports
@@ -13,7 +22,25 @@ from tqdm import tqdm
 
 # Local library imports
 if TYPE_CHECKING:
+    from med_crawler.crawler.checkpoint import Checkpoint
+    from med_crawler.crawler.freshness import Freshness
+    from med_crawler.crawler.idspace import IdSpace
+    from med_crawler.crawler.ratelimit import TokenBucket
+    from med_crawler.crawler.shard import Shard
     from med_crawler.log import Logger
+from med_crawler.crawler.control import AdaptiveLimiter
+from med_crawler.crawler.idspace import IdSpaceException, discover
+from med_crawler.crawler.metrics import Metrics
+from med_crawler.crawler.retry import DeadLetter, RetryPolicy
+from med_crawler.crawler.sink import Sink, StreamSink
+from med_crawler.crawler.transport import (
+    TRANSIENT_ERRORS,
+    Transport,
+    ThreadTransport,
+    WebContents,
+    fetch_sync,
+)
+from med_crawler.fragment import entry_fragment, is_well_formed
 from med_crawler.log import Level
 
 
@@ -23,74 +50,350 @@ __all__ = ["Crawler", "WebContents", "LAST_MED_ENTRY_ID"]
 LAST_MED_ENTRY_ID = 54_083
 
 
-@dataclass(slots=True, frozen=True)
-class WebContents:
-    text: str
-    status_code: int
+@dataclass(slots=True)
+class Trace:
+    """Outcome of the last attempt at a request and the attempts made."""
 
-    @property
-    def ok(self) -> bool:
-        return self.status_code == 200
+    attempts: int = 0
+    latency: float | None = None
+    bytes: int = 0
 
 
 class Crawler:
-    url: ClassVar[
-        str
-    ] = "https://quod.lib.umich.edu/m/middle-english-dictionary/dictionary/"
+    url = "https://quod.lib.umich.edu/m/middle-english-dictionary/dictionary/"
 
     def __init__(
         self,
-        output: TextIO,
+        output: TextIO | Sink,
         logger: Logger,
         last_entry_id: int = LAST_MED_ENTRY_ID,
         concurrent_requests: int = 5,
+        transport: Transport | None = None,
+        max_concurrent_requests: int | None = None,
+        checkpoint: Checkpoint | None = None,
+        freshness: Freshness | None = None,
+        request_budget: int | None = None,
+        time_budget: float | None = None,
+        retry: RetryPolicy | None = None,
+        dead_letter: DeadLetter | None = None,
+        ids: Iterable[int] | None = None,
+        idspace: IdSpace | None = None,
+        shard: Shard | None = None,
+        url: str | None = None,
+        metrics: Metrics | None = None,
+        rate_limit: TokenBucket | None = None,
+        fragment: bool = False,
     ) -> None:
-        self.output = output
+        self.sink = output if isinstance(output, Sink) else StreamSink(output)
         self.logger = logger
         self.last_entry_id = last_entry_id
-        self.semaphore = asyncio.Semaphore(concurrent_requests)
+        self.limiter = AdaptiveLimiter(
+            initial=concurrent_requests,
+            maximum=max_concurrent_requests or 4 * concurrent_requests,
+        )
+        self.transport = transport or ThreadTransport()
+        self.checkpoint = checkpoint
+        self.freshness = freshness
+        self.request_budget = request_budget
+        self.time_budget = time_budget
+        self.retry = retry or RetryPolicy()
+        self.dead_letter = dead_letter
+        self.ids = ids
+        self.idspace = idspace
+        self.shard = shard
+        if url is not None:
+            self.url = url
+        self.metrics = metrics or Metrics()
+        self.rate_limit = rate_limit
+        self.fragment = fragment
+        self._deadline: float | None = None
+        self._stopping = False
 
     def crawl(self, verbose: bool = False) -> None:
         asyncio.run(self.crawl_asyc(verbose))
 
     async def crawl_asyc(self, verbose: bool = False) -> None:
-        tasks: list[Coroutine[Any, Any, None]] = []
+        ids = self.schedule()
+        self._stopping = False
+        self._deadline = None
+        self.metrics.started = time.time()
+        if self.time_budget is not None:
+            self._deadline = time.monotonic() + self.time_budget
 
         if verbose:
             bar = tqdm(
-                total=self.last_entry_id,
+                total=len(ids) if isinstance(ids, Sized) else None,
                 desc="Crawling Middle English Dictionary",
             )
         else:
             bar = None
 
-        for id in range(1, self.last_entry_id + 1):
-            tasks.append(self.http_get(id, bar=bar))
-        await asyncio.gather(*tasks, return_exceptions=True)
+        # A fixed pool of workers pulls from one shared lazy iterator, so
+        # memory does not grow with the size of the ID space. The pool is
+        # as large as the limiter may ever allow requests in flight.
+        pending = iter(ids)
+        workers = [
+            asyncio.create_task(self.worker(pending, bar))
+            for _ in range(self.limiter.maximum)
+        ]
+        monitor = asyncio.create_task(self.metrics.monitor())
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGINT, self.stop, workers)
+            handles_sigint = True
+        except (NotImplementedError, RuntimeError):
+            handles_sigint = False
+        try:
+            await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            raise KeyboardInterrupt from None
+        finally:
+            for w in workers:
+                w.cancel()
+            monitor.cancel()
+            if handles_sigint:
+                loop.remove_signal_handler(signal.SIGINT)
+            await self.transport.close()
+            self.sink.close()
+            self.metrics.concurrency = self.limiter.limit
+            self.metrics.close()
+        self.logger.log(
+            f"settled on {self.limiter.limit} concurrent requests",
+            Level.OK,
+            event="settled",
+            concurrency=self.limiter.limit,
+        )
 
-    async def http_get(self, id: int = 0, **kwargs: tqdm | None) -> None:
-        async with self.semaphore:
-            result = await asyncio.to_thread(self.http_get_sync, id)
-            if self.semaphore.locked():
-                await asyncio.sleep(5)
-            if result.ok:
-                if b := kwargs.get("bar", None):
-                    b.update(1)
-                self.logger.log(f"crawled MED{id}", Level.OK)
-                self.output.write(result.text)
-            else:
+    def discover(self, start: int | None = None, window: int = 16) -> int:
+        """Probe MED for its last entry ID and crawl up to it from now on."""
+        return asyncio.run(self.discover_async(start, window))
+
+    async def discover_async(
+        self, start: int | None = None, window: int = 16
+    ) -> int:
+        async def exists(id: int) -> bool:
+            result = await self.request(id)
+            if self.idspace is not None:
+                self.idspace.record(id, result.status_code)
+            if not (result.ok or result.status_code == 404):
+                raise IdSpaceException(
+                    f"MED{id} returned status code: {result.status_code}"
+                )
+            return result.ok
+
+        try:
+            last = await discover(exists, start or self.last_entry_id, window)
+        finally:
+            await self.transport.close()
+        self.last_entry_id = last
+        if self.idspace is not None:
+            self.idspace.set_last_id(last)
+        self.logger.log(
+            f"discovered last entry MED{last}",
+            Level.OK,
+            event="discovered",
+            id=last,
+        )
+        return last
+
+    def schedule(self) -> Iterable[int]:
+        """Return MED IDs to crawl, lazily unless they have to be sorted."""
+        ids: Iterable[int] = range(1, self.last_entry_id + 1)
+        if self.ids is not None:
+            ids = self.ids
+        if self.shard is not None:
+            ids = self.shard.filter(ids)
+        if self.idspace is not None:
+            ids = self.idspace.without_gaps(ids)
+        if self.checkpoint is not None:
+            ids = self.checkpoint.pending(ids)
+        if self.freshness is not None:
+            ids = self.freshness.stalest(ids)
+        if self.request_budget is not None:
+            ids = itertools.islice(ids, self.request_budget)
+        return ids
+
+    def stop(self, workers: list[asyncio.Task[None]] | None = None) -> None:
+        """Stop scheduling new IDs and let in-flight requests drain.
+
+        Stopping a crawl that is already draining cancels the workers.
+        """
+        if self._stopping:
+            for w in workers or []:
+                w.cancel()
+            return
+        self._stopping = True
+        self.logger.log(
+            "stopping; draining in-flight requests", Level.WARN, event="stop"
+        )
+
+    async def worker(self, ids: Iterator[int], bar: tqdm | None) -> None:
+        for id in ids:
+            deadline = self._deadline
+            if self._stopping or (deadline and time.monotonic() > deadline):
+                return
+            try:
+                await self.http_get(id, bar=bar)
+            except Exception as err:
                 self.logger.log(
-                    f"failed to crawl MED{id}. "
-                    f"returned status code: {result.status_code}",
+                    f"failed to crawl MED{id}. raised: {err!r}",
                     Level.ERROR,
+                    event="error",
+                    id=id,
+                    error=repr(err),
                 )
 
-    def http_get_sync(self, id: int = 0) -> WebContents:
-        url = urllib.parse.urljoin(self.url, f"MED{id}")
-        response = requests.get(url)
+    async def http_get(self, id: int = 0, **kwargs: tqdm | None) -> None:
+        headers = self.freshness.headers(id) if self.freshness else None
+        trace = Trace()
         try:
-            response.raise_for_status()
-        except requests.HTTPError:
-            return WebContents("", response.status_code)
+            result = await self.request(id, headers, trace)
+        except Exception as err:
+            self.fail(id, repr(err))
+            raise
+
+        fields = {
+            "id": id,
+            "status": result.status_code,
+            "latency": trace.latency,
+            "bytes": trace.bytes,
+            "attempt": trace.attempts,
+        }
+        if result.ok and self.fragment:
+            result = self.cut(id, result)
+        written = False
+        if result.ok or result.not_modified:
+            if b := kwargs.get("bar", None):
+                b.update(1)
+            if self.freshness is None or self.freshness.update(id, result):
+                self.logger.log(
+                    f"crawled MED{id}", Level.OK, event="crawled", **fields
+                )
+                self.sink.put(id, result)
+                written = True
+            else:
+                self.logger.log(
+                    f"MED{id} unchanged", Level.OK, event="unchanged", **fields
+                )
         else:
-            return WebContents(response.text, response.status_code)
+            self.logger.log(
+                f"failed to crawl MED{id}. "
+                f"returned status code: {result.status_code}",
+                Level.ERROR,
+                event="failed",
+                **fields,
+            )
+            if result.status_code != 404 and self.dead_letter is not None:
+                self.dead_letter.put(id, f"status code {result.status_code}")
+        if self.checkpoint is not None:
+            self.checkpoint.record(id, result.status_code)
+        if self.idspace is not None:
+            self.idspace.record(id, result.status_code)
+        if written:
+            # Only after the ID is recorded, so that a sink failing it
+            # later, like a parser, has the last word.
+            await self.sink.drain()
+
+    async def request(
+        self,
+        id: int,
+        headers: Mapping[str, str] | None = None,
+        trace: Trace | None = None,
+    ) -> WebContents:
+        """Fetch an entry, retrying transient failures per the policy."""
+        attempt = 0
+        trace = trace or Trace()
+        while True:
+            trace.attempts = attempt + 1
+            try:
+                result = await self.fetch(id, headers, trace)
+            except TRANSIENT_ERRORS as err:
+                if self._stopping or not self.retry.retries(attempt):
+                    raise
+                reason, delay = repr(err), self.retry.delay(attempt)
+            else:
+                if not (
+                    self.retry.transient(result.status_code)
+                    and self.retry.retries(attempt)
+                    and not self._stopping
+                ):
+                    return result
+                reason = f"status code {result.status_code}"
+                delay = self.retry.delay(
+                    attempt, result.headers.get("Retry-After")
+                )
+            attempt += 1
+            self.metrics.observe_retry()
+            self.logger.log(
+                f"retrying MED{id} in {delay:.2f}s "
+                f"(attempt {attempt + 1}). {reason}",
+                Level.WARN,
+                event="retry",
+                id=id,
+                attempt=attempt,
+                latency=trace.latency,
+                reason=reason,
+                delay=delay,
+            )
+            await asyncio.sleep(delay)
+
+    async def fetch(
+        self,
+        id: int,
+        headers: Mapping[str, str] | None = None,
+        trace: Trace | None = None,
+    ) -> WebContents:
+        """Fetch a single entry within the concurrency and rate limits."""
+        queued = time.perf_counter()
+        await self.limiter.acquire()
+        self.metrics.observe_wait(time.perf_counter() - queued)
+        if self.rate_limit is not None:
+            # Tokens are taken in a slot so that requests go out when due.
+            self.metrics.observe_rate_wait(await self.rate_limit.acquire())
+        start = time.perf_counter()
+        self.metrics.in_flight += 1
+        try:
+            result = await self.transport.get(self.entry_url(id), headers)
+        except Exception as err:
+            latency = time.perf_counter() - start
+            if trace is not None:
+                trace.latency, trace.bytes = latency, 0
+            self.metrics.observe_error(latency, err)
+            await self.limiter.release(latency, None)
+            raise
+        finally:
+            self.metrics.in_flight -= 1
+        latency = time.perf_counter() - start
+        size = len(result.text.encode("utf-8"))
+        if trace is not None:
+            trace.latency, trace.bytes = latency, size
+        self.metrics.observe_response(latency, result.status_code, size)
+        await self.limiter.release(latency, result.status_code)
+        self.metrics.concurrency = self.limiter.limit
+        return result
+
+    def cut(self, id: int, result: WebContents) -> WebContents:
+        """Keep only the entry fragment of a page if it is well formed."""
+        fragment = entry_fragment(result.text)
+        if fragment is None or not is_well_formed(fragment):
+            self.logger.log(
+                f"kept whole page of MED{id}; no well-formed entry found",
+                Level.WARN,
+                event="fragment",
+                id=id,
+            )
+            return result
+        return replace(result, text=fragment)
+
+    def fail(self, id: int, reason: str) -> None:
+        """Record an ID that raised after all retries or did not parse."""
+        if self.checkpoint is not None:
+            self.checkpoint.record(id, None)
+        if self.dead_letter is not None:
+            self.dead_letter.put(id, reason)
+
+    def http_get_sync(self, id: int = 0) -> WebContents:
+        return fetch_sync(self.entry_url(id))
+
+    def entry_url(self, id: int) -> str:
+        return urllib.parse.urljoin(self.url, f"MED{id}")
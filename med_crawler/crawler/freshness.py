@@ -0,0 +1,130 @@
+"""Per-entry validators for incremental recrawls of MED."""
+
+# Standard library imports
+from __future__ import annotations
+from dataclasses import dataclass
+import sqlite3
+import time
+from typing import Iterable
+
+# Local library imports
+from med_crawler.store import content_hash
+from med_crawler.crawler.transport import WebContents
+
+
+__all__ = ["Freshness", "FreshnessException"]
+
+
+class FreshnessException(Exception):
+    """FreshnessException"""
+
+
+@dataclass(slots=True)
+class Validators:
+    etag: str | None
+    last_modified: str | None
+    content_hash: str | None
+    fetched: float
+
+
+class Freshness:
+    """SQLite store of ETag, Last-Modified and content hash per MED ID.
+
+    The whole table is held in memory for lookups; changed rows are written
+    back at most every `flush_interval` seconds and on exit.
+    """
+
+    def __init__(self, file_name: str, flush_interval: float = 1.0) -> None:
+        self.file_name = file_name
+        self.flush_interval = flush_interval
+        self.validators: dict[int, Validators] = {}
+        self._dirty: set[int] = set()
+        self._last_flush = time.monotonic()
+
+    def __enter__(self) -> Freshness:
+        try:
+            self.conn = sqlite3.connect(self.file_name)
+            self.conn.execute("PRAGMA journal_mode=WAL;")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS freshness (
+                    id INTEGER PRIMARY KEY,
+                    etag TEXT NULL,
+                    last_modified TEXT NULL,
+                    content_hash TEXT NULL,
+                    fetched REAL NOT NULL
+                );
+                """
+            )
+            self.conn.commit()
+            for id, *row in self.conn.execute("SELECT * FROM freshness;"):
+                self.validators[id] = Validators(*row)
+        except sqlite3.Error as err:
+            raise FreshnessException(err) from err
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback) -> None:
+        self.flush()
+        self.conn.close()
+
+    def headers(self, id: int) -> dict[str, str]:
+        """Return conditional request headers for the entry."""
+        headers: dict[str, str] = {}
+        if (v := self.validators.get(id)) is None:
+            return headers
+        if v.etag:
+            headers["If-None-Match"] = v.etag
+        if v.last_modified:
+            headers["If-Modified-Since"] = v.last_modified
+        return headers
+
+    def update(self, id: int, contents: WebContents) -> bool:
+        """Store the validators of a response; True if the page changed."""
+        previous = self.validators.get(id)
+        if contents.not_modified and previous is not None:
+            previous.fetched = time.time()
+            changed = False
+        else:
+            digest = content_hash(contents.text.encode("utf-8"))
+            changed = previous is None or previous.content_hash != digest
+            self.validators[id] = Validators(
+                etag=contents.headers.get("ETag"),
+                last_modified=contents.headers.get("Last-Modified"),
+                content_hash=digest,
+                fetched=time.time(),
+            )
+        self._dirty.add(id)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return changed
+
+    def stalest(self, ids: Iterable[int]) -> list[int]:
+        """Order IDs by last fetch time, never fetched ones first."""
+        return sorted(
+            ids,
+            key=lambda id: (
+                v.fetched if (v := self.validators.get(id)) else 0.0
+            ),
+        )
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._dirty:
+            return
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO freshness "
+            "(id, etag, last_modified, content_hash, fetched) "
+            "VALUES (?, ?, ?, ?, ?);",
+            [
+                (
+                    id,
+                    (v := self.validators[id]).etag,
+                    v.last_modified,
+                    v.content_hash,
+                    v.fetched,
+                )
+                for id in self._dirty
+            ],
+        )
+        self.conn.commit()
+        self._dirty.clear()
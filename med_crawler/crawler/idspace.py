@@ -0,0 +1,163 @@
+"""Knowledge of the MED ID space: its upper bound and the gaps in it."""
+
+# Standard library imports
+from __future__ import annotations
+import sqlite3
+import time
+from typing import Awaitable, Callable, Iterable, Iterator
+
+
+__all__ = ["IdSpace", "IdSpaceException", "discover"]
+
+
+class IdSpaceException(Exception):
+    """IdSpaceException"""
+
+
+class IdSpace:
+    """SQLite store of IDs known to return 404 and the last known entry ID.
+
+    Gaps are kept in memory for filtering; new ones are committed at most
+    every `flush_interval` seconds and on exit. Only IDs up to the last
+    known one count as gaps, since MED grows past its end.
+    """
+
+    def __init__(self, file_name: str, flush_interval: float = 1.0) -> None:
+        self.file_name = file_name
+        self.flush_interval = flush_interval
+        self.gaps: set[int] = set()
+        self.last_id: int | None = None
+        self._added: set[int] = set()
+        self._removed: set[int] = set()
+        self._last_flush = time.monotonic()
+
+    def __enter__(self) -> IdSpace:
+        try:
+            self.conn = sqlite3.connect(self.file_name)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS gap (id INTEGER PRIMARY KEY);"
+            )
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS bound (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    last_id INTEGER NOT NULL,
+                    updated REAL NOT NULL
+                );
+                """
+            )
+            self.conn.commit()
+            cur = self.conn.execute("SELECT id FROM gap;")
+            self.gaps = {row[0] for row in cur}
+            cur = self.conn.execute("SELECT last_id FROM bound;")
+            if row := cur.fetchone():
+                self.last_id = row[0]
+        except sqlite3.Error as err:
+            raise IdSpaceException(err) from err
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback) -> None:
+        self.flush()
+        self.conn.close()
+
+    def without_gaps(self, ids: Iterable[int]) -> Iterator[int]:
+        return (id for id in ids if id not in self.gaps)
+
+    def record(self, id: int, status_code: int) -> None:
+        """Track gaps from the status code of a finished request."""
+        match status_code:
+            case 404 if id not in self.gaps and (
+                self.last_id is None or id <= self.last_id
+            ):
+                self.gaps.add(id)
+                self._added.add(id)
+                self._removed.discard(id)
+            case 200 | 304 if id in self.gaps:
+                self.gaps.discard(id)
+                self._removed.add(id)
+                self._added.discard(id)
+            case _:
+                return
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def set_last_id(self, last_id: int) -> None:
+        """Store the bound and forget gaps past the end it used to be."""
+        end = min(last_id, self.last_id or last_id)
+        self.last_id = last_id
+        self.gaps = {id for id in self.gaps if id <= end}
+        self._added = {id for id in self._added if id <= end}
+        self.conn.execute("DELETE FROM gap WHERE id > ?;", (end,))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO bound (id, last_id, updated) "
+            "VALUES (0, ?, ?);",
+            (last_id, time.time()),
+        )
+        self.conn.commit()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not (self._added or self._removed):
+            return
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO gap (id) VALUES (?);",
+            [(id,) for id in self._added],
+        )
+        self.conn.executemany(
+            "DELETE FROM gap WHERE id = ?;",
+            [(id,) for id in self._removed],
+        )
+        self.conn.commit()
+        self._added.clear()
+        self._removed.clear()
+
+
+async def discover(
+    exists: Callable[[int], Awaitable[bool]],
+    start: int = 1,
+    window: int = 16,
+) -> int:
+    """Find the last existing entry ID with galloping and binary probing.
+
+    MED has gaps, so a probe at `p` counts as alive when any ID in
+    `[p, p + window)` exists. Probing gallops from `start` in doubling
+    steps, upwards until it hits a dead probe or, if `start` itself is
+    dead, downwards until it hits an alive one. It then bisects between
+    the last alive and the first dead probe, which costs O(window * log n)
+    requests for an upper bound n. Gaps longer than `window` right past the
+    last entry are taken for the end of the ID space.
+    """
+
+    async def alive(probe: int) -> int | None:
+        for id in range(probe, probe + window):
+            if await exists(id):
+                return id
+        return None
+
+    hi = max(1, start)
+    found = await alive(hi)
+    step = 1
+    if found is None:
+        # Started past the end: gallop downwards to an alive probe.
+        while found is None:
+            if hi == 1:
+                return 0
+            probe = max(1, hi - step)
+            if (found := await alive(probe)) is None:
+                hi = probe
+            step *= 2
+        lo = found
+    else:
+        lo = found
+        while True:
+            if (hit := await alive(lo + step)) is None:
+                hi = lo + step
+                break
+            lo, step = hit, step * 2
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if (hit := await alive(mid)) is None:
+            hi = mid
+        else:
+            lo = hit
+    return lo
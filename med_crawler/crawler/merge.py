@@ -0,0 +1,103 @@
+"""Merging the outputs of sharded crawls into one corpus."""
+
+# Standard library imports
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+import shutil
+import sqlite3
+from typing import BinaryIO, Sequence, TextIO
+
+# Local library imports
+from med_crawler.crawler.archive import iter_archive
+from med_crawler.crawler.records import RecordSink, iter_records
+from med_crawler.store import iter_store
+from med_crawler.crawler.transport import WebContents
+from med_crawler.parser.db import SqliteMedDB
+
+
+__all__ = [
+    "merge_archives",
+    "merge_dirs",
+    "merge_json",
+    "merge_records",
+    "merge_sqlite",
+    "merge_text",
+]
+
+
+def merge_text(inputs: Sequence[str | Path], out: TextIO) -> None:
+    """Concatenate unframed text outputs in the order given."""
+    for path in inputs:
+        with open(path, "r") as f:
+            shutil.copyfileobj(f, out)
+
+
+def merge_dirs(inputs: Sequence[str | Path], root: str | Path) -> None:
+    """Copy entry files of directory stores under a single root."""
+    for source in inputs:
+        for path in iter_store(source):
+            target = Path(root) / path.relative_to(source)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, target)
+
+
+def merge_archives(inputs: Sequence[str | Path], out: BinaryIO) -> None:
+    """Copy archive records ordered by MED ID without recompressing them."""
+    spans: list[tuple[int, int, int, int]] = []
+    for n, path in enumerate(inputs):
+        offsets = [(r.id, r.offset) for r in iter_archive(path)]
+        ends = [offset for _, offset in offsets[1:]]
+        ends.append(os.path.getsize(path))
+        for (id, offset), end in zip(offsets, ends):
+            spans.append((id, n, offset, end - offset))
+    files = [open(path, "rb") for path in inputs]
+    try:
+        for _, n, offset, length in sorted(spans):
+            files[n].seek(offset)
+            out.write(files[n].read(length))
+    finally:
+        for f in files:
+            f.close()
+
+
+def merge_json(inputs: Sequence[str | Path], out: TextIO) -> None:
+    """Merge JSON arrays of parsed entries ordered by MED ID."""
+    entries = []
+    for path in inputs:
+        with open(path, "r") as f:
+            entries.extend(json.load(f))
+    entries.sort(key=lambda e: int(e["source_id"].removeprefix("MED")))
+    json.dump(entries, out)
+
+
+def merge_records(inputs: Sequence[str | Path], file_name: str) -> None:
+    """Append the latest records of every input to one indexed file."""
+    sink = RecordSink(file_name)
+    try:
+        for path in inputs:
+            for record in iter_records(path, latest=True):
+                sink.put(record.id, WebContents(record.text, 200))
+    finally:
+        sink.close()
+
+
+def merge_sqlite(inputs: Sequence[str | Path], file_name: str) -> None:
+    """Copy the rows of SQLite dumps into a single database."""
+    with SqliteMedDB(file_name=file_name) as db:
+        db.create_tables()
+        tables = ("entry", "pos", "etymology", "form", "sense", "citation")
+        for path in inputs:
+            db.conn.execute("ATTACH DATABASE ? AS shard;", (str(path),))
+            try:
+                for table in tables:
+                    db.conn.execute(
+                        f"INSERT INTO {table} SELECT * FROM shard.{table};"
+                    )
+                db.conn.commit()
+            except sqlite3.Error:
+                db.conn.rollback()
+                raise
+            finally:
+                db.conn.execute("DETACH DATABASE shard;")
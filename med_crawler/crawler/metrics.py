@@ -0,0 +1,243 @@
+"""Live crawl metrics exported in the Prometheus text format."""
+
+# Standard library imports
+from __future__ import annotations
+import asyncio
+import bisect
+from collections import Counter
+import json
+import math
+import os
+import tempfile
+import time
+from typing import Any
+
+
+__all__ = ["Histogram", "Metrics"]
+
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+PREFIX = "med_crawler"
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds, as Prometheus has it."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating within its bucket."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def lines(self, name: str) -> list[str]:
+        lines, cumulative = [], 0
+        for bound, n in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += n
+            le = "+Inf" if bound == math.inf else repr(bound)
+            lines.append(f'{name}_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum {self.sum}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """Counters, gauges and histograms describing a running crawl.
+
+    Request latency is timed around the transport alone, limiter wait is
+    the time a request queued for a concurrency slot, and event loop lag is
+    how late the periodic export wakes up. A slow server shows in the
+    first, a saturated limit in the second and a busy loop in the third.
+    Time held back by a rate limit is counted separately.
+    With `file_name` set, the Prometheus text is rewritten every
+    `interval` seconds; with `summary_file` set, a JSON summary is written
+    when the crawl ends.
+    """
+
+    def __init__(
+        self,
+        file_name: str | None = None,
+        summary_file: str | None = None,
+        interval: float = 5.0,
+    ) -> None:
+        self.file_name = file_name
+        self.summary_file = summary_file
+        self.interval = interval
+        self.latency = Histogram()
+        self.limiter_wait = Histogram()
+        self.rate_wait = Histogram()
+        self.loop_lag = Histogram()
+        self.status_codes: Counter[int] = Counter()
+        self.errors: Counter[str] = Counter()
+        self.retries = 0
+        self.bytes = 0
+        self.in_flight = 0
+        self.concurrency = 0
+        self.started = time.time()
+
+    def observe_wait(self, wait: float) -> None:
+        self.limiter_wait.observe(wait)
+
+    def observe_rate_wait(self, wait: float) -> None:
+        self.rate_wait.observe(wait)
+
+    def observe_response(
+        self, latency: float, status_code: int, size: int
+    ) -> None:
+        self.latency.observe(latency)
+        self.status_codes[status_code] += 1
+        self.bytes += size
+
+    def observe_error(self, latency: float, err: BaseException) -> None:
+        self.latency.observe(latency)
+        self.errors[type(err).__name__] += 1
+
+    def observe_retry(self) -> None:
+        self.retries += 1
+
+    async def monitor(self) -> None:
+        """Measure event loop lag and export metrics until cancelled."""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.loop_lag.observe(
+                max(0.0, time.monotonic() - start - self.interval)
+            )
+            self.write()
+
+    def prometheus(self) -> str:
+        lines = []
+
+        def metric(name: str, kind: str, doc: str) -> str:
+            name = f"{PREFIX}_{name}"
+            lines.extend([f"# HELP {name} {doc}", f"# TYPE {name} {kind}"])
+            return name
+
+        name = metric(
+            "request_duration_seconds", "histogram", "Transport latency."
+        )
+        lines.extend(self.latency.lines(name))
+        name = metric(
+            "limiter_wait_seconds",
+            "histogram",
+            "Time spent waiting for a concurrency slot.",
+        )
+        lines.extend(self.limiter_wait.lines(name))
+        name = metric(
+            "rate_limit_wait_seconds",
+            "histogram",
+            "Time spent waiting for a rate limit token.",
+        )
+        lines.extend(self.rate_wait.lines(name))
+        name = metric(
+            "event_loop_lag_seconds",
+            "histogram",
+            "Delay of the event loop past scheduled wake-ups.",
+        )
+        lines.extend(self.loop_lag.lines(name))
+        name = metric("responses_total", "counter", "Responses by status.")
+        for code, n in sorted(self.status_codes.items()):
+            lines.append(f'{name}{{code="{code}"}} {n}')
+        name = metric(
+            "request_errors_total", "counter", "Requests that raised."
+        )
+        for error, n in sorted(self.errors.items()):
+            lines.append(f'{name}{{error="{error}"}} {n}')
+        name = metric("retries_total", "counter", "Retried requests.")
+        lines.append(f"{name} {self.retries}")
+        name = metric(
+            "downloaded_bytes_total", "counter", "Response body bytes."
+        )
+        lines.append(f"{name} {self.bytes}")
+        name = metric("requests_in_flight", "gauge", "Requests in flight.")
+        lines.append(f"{name} {self.in_flight}")
+        name = metric("concurrency_limit", "gauge", "Current adaptive limit.")
+        lines.append(f"{name} {self.concurrency}")
+        name = metric("start_time_seconds", "gauge", "Crawl start, Unix time.")
+        lines.append(f"{name} {self.started}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict[str, Any]:
+        elapsed = time.time() - self.started
+        requests = self.latency.count
+        return {
+            "elapsed": elapsed,
+            "requests": requests,
+            "requests_per_sec": requests / elapsed if elapsed else 0.0,
+            "bytes": self.bytes,
+            "status_codes": {
+                str(code): n for code, n in self.status_codes.items()
+            },
+            "errors": dict(self.errors),
+            "retries": self.retries,
+            "concurrency": self.concurrency,
+            "latency": self.latency.summary(),
+            "limiter_wait": self.limiter_wait.summary(),
+            "rate_limit_wait": self.rate_wait.summary(),
+            "event_loop_lag": self.loop_lag.summary(),
+        }
+
+    def write(self) -> None:
+        if self.file_name is not None:
+            write_atomic(self.file_name, self.prometheus())
+
+    def close(self) -> None:
+        self.write()
+        if self.summary_file is not None:
+            write_atomic(
+                self.summary_file, json.dumps(self.summary(), indent=2)
+            )
+
+
+def write_atomic(file_name: str, text: str) -> None:
+    """Replace a file in one step so scrapers never see half of it."""
+    directory = os.path.dirname(os.path.abspath(file_name))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp, file_name)
+    except BaseException:
+        os.unlink(tmp)
+        raise
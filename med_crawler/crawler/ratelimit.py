@@ -0,0 +1,98 @@
+"""Token-bucket limit on the rate of requests sent to MED."""
+
+# Standard library imports
+from __future__ import annotations
+import asyncio
+import os
+import struct
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+
+__all__ = ["TokenBucket", "RateLimitException"]
+
+
+STATE = struct.Struct("<d")
+
+
+class RateLimitException(Exception):
+    ...
+
+
+class TokenBucket:
+    """Limit of `rate` requests per second with bursts of up to `burst`.
+
+    The bucket is kept as the time at which it will be full again, which is
+    the generic cell rate algorithm form of a token bucket. Every request
+    reserves a token and sleeps until it is due, so waiting requests are
+    served in order and the budget is saturated but never exceeded.
+
+    With `file_name` set, the bucket lives in that file and is updated
+    under an exclusive lock, so that all crawler processes on a host using
+    the same file share one budget. They should agree on rate and burst.
+    """
+
+    def __init__(
+        self, rate: float, burst: int = 1, file_name: str | None = None
+    ) -> None:
+        if rate <= 0:
+            raise RateLimitException(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.interval = 1 / rate
+        self.file_name = file_name
+        self._full_at = 0.0
+        self._fd: int | None = None
+        if file_name is not None:
+            if fcntl is None:
+                raise RateLimitException(
+                    "shared rate limits need fcntl file locks"
+                )
+            self._fd = os.open(file_name, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def clock(self) -> float:
+        # Processes share the wall clock; a single one can use a steadier one.
+        return time.time() if self.file_name else time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it."""
+        if self._fd is None:
+            delay, self._full_at = self._take(self._full_at)
+            return delay
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            data = os.pread(self._fd, STATE.size, 0)
+            full_at = STATE.unpack(data)[0] if len(data) == STATE.size else 0
+            delay, full_at = self._take(full_at)
+            os.pwrite(self._fd, STATE.pack(full_at), 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return delay
+
+    def _take(self, full_at: float) -> tuple[float, float]:
+        now = self.clock()
+        full_at = max(full_at, now)
+        delay = max(0.0, full_at - now - (self.burst - 1) * self.interval)
+        return delay, full_at + self.interval
+
+    async def acquire(self) -> float:
+        """Wait for a token and return the time spent waiting."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> TokenBucket:
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback) -> None:
+        self.close()
@@ -0,0 +1,254 @@
+"""Length-prefixed crawl records with a random-access index by MED ID.
+
+Each record is a 16-byte header (magic, MED ID, body length and CRC-32 of
+the body) followed by the UTF-8 page. The `.idx` sidecar is an array of
+8-byte slots addressed by MED ID, each holding one more than the offset
+of the latest record of that ID, so zero marks IDs never stored. Looking
+an entry up costs two reads whatever the size of the file.
+"""
+
+# Standard library imports
+from __future__ import annotations
+import bisect
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import struct
+from typing import BinaryIO, Iterator
+import zlib
+
+# Local library imports
+from med_crawler.crawler.transport import WebContents
+
+
+__all__ = [
+    "Record",
+    "RecordException",
+    "RecordFile",
+    "RecordSink",
+    "iter_records",
+]
+
+
+MAGIC = b"MEDR"
+HEADER = struct.Struct("<4sIII")
+SLOT = struct.Struct("<Q")
+
+
+class RecordException(Exception):
+    ...
+
+
+@dataclass(slots=True, frozen=True)
+class Record:
+    id: int
+    text: str
+    offset: int
+    size: int
+
+
+def index_name(path: str | Path) -> str:
+    return f"{path}.idx"
+
+
+def encode_record(id: int, text: str) -> bytes:
+    body = text.encode("utf-8")
+    return HEADER.pack(MAGIC, id, len(body), zlib.crc32(body)) + body
+
+
+def read_record(f: BinaryIO, offset: int) -> Record | None:
+    """Read the record at `offset`, or None at the end of the file."""
+    f.seek(offset)
+    head = f.read(HEADER.size)
+    if not head:
+        return None
+    if len(head) < HEADER.size:
+        raise RecordException(f"truncated record at offset {offset}")
+    magic, id, length, crc = HEADER.unpack(head)
+    if magic != MAGIC:
+        raise RecordException(f"no record at offset {offset}")
+    body = f.read(length)
+    if len(body) < length or zlib.crc32(body) != crc:
+        raise RecordException(f"corrupt record at offset {offset}")
+    return Record(id, body.decode("utf-8"), offset, HEADER.size + length)
+
+
+class RecordSink:
+    """Crawler sink appending framed records and indexing them by MED ID.
+
+    Index slots are held back until the records they point at have been
+    flushed, so that the index never points past the data. When appending,
+    records after the last indexed one are indexed and a record left
+    incomplete by a crash is cut off.
+    """
+
+    def __init__(
+        self,
+        file_name: str | Path,
+        append: bool = False,
+        pending_slots: int = 1024,
+    ) -> None:
+        self.file_name = file_name
+        self.pending_slots = pending_slots
+        self.pending: list[tuple[int, int]] = []
+        append = append and os.path.exists(file_name)
+        self.out = open(file_name, "r+b" if append else "w+b")
+        index = index_name(file_name)
+        if append and os.path.exists(index):
+            self.index = open(index, "r+b")
+        else:
+            self.index = open(index, "w+b")
+        self.offset = self._recover() if append else 0
+
+    def _recover(self) -> int:
+        # Start from the last indexed record that is whole, index the
+        # records after it and cut the file after the last complete one.
+        size = os.fstat(self.out.fileno()).st_size
+        offset = 0
+        for start in sorted(set(iter_offsets(self.index)), reverse=True):
+            try:
+                if start < size and read_record(self.out, start):
+                    offset = start
+                    break
+            except RecordException:
+                pass
+        try:
+            while (record := read_record(self.out, offset)) is not None:
+                self._index(record.id, offset)
+                offset += record.size
+        except RecordException:
+            pass
+        for id, slot in list(iter_slots(self.index)):
+            if slot >= offset:
+                self.index.seek(id * SLOT.size)
+                self.index.write(SLOT.pack(0))
+        if offset < size:
+            self.out.truncate(offset)
+        self.out.seek(offset)
+        return offset
+
+    def put(self, id: int, contents: WebContents) -> None:
+        data = encode_record(id, contents.text)
+        self.out.write(data)
+        self.pending.append((id, self.offset))
+        self.offset += len(data)
+        if len(self.pending) >= self.pending_slots:
+            self.flush()
+
+    def _index(self, id: int, offset: int) -> None:
+        self.index.seek(id * SLOT.size)
+        self.index.write(SLOT.pack(offset + 1))
+
+    async def drain(self) -> None:
+        return None
+
+    def flush(self) -> None:
+        self.out.flush()
+        for id, offset in self.pending:
+            self._index(id, offset)
+        self.pending.clear()
+        self.index.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.out.close()
+        self.index.close()
+
+
+def iter_slots(index: BinaryIO) -> Iterator[tuple[int, int]]:
+    """Yield IDs in an index with the offsets of their latest records."""
+    index.seek(0)
+    data = index.read()
+    data = data[: len(data) - len(data) % SLOT.size]
+    for id, (slot,) in enumerate(SLOT.iter_unpack(data)):
+        if slot:
+            yield id, slot - 1
+
+
+def iter_offsets(index: BinaryIO) -> Iterator[int]:
+    return (offset for _, offset in iter_slots(index))
+
+
+class RecordFile:
+    """Random access to the records of a file by MED ID."""
+
+    def __init__(self, file_name: str | Path) -> None:
+        self.file_name = file_name
+
+    def __enter__(self) -> RecordFile:
+        self.data = open(self.file_name, "rb")
+        try:
+            self.index = open(index_name(self.file_name), "rb")
+        except OSError:
+            self.data.close()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback) -> None:
+        self.data.close()
+        self.index.close()
+
+    def offset(self, id: int) -> int | None:
+        self.index.seek(id * SLOT.size)
+        data = self.index.read(SLOT.size)
+        if len(data) < SLOT.size or not (slot := SLOT.unpack(data)[0]):
+            return None
+        return slot - 1
+
+    def __getitem__(self, id: int) -> Record:
+        offset = self.offset(id)
+        if offset is None:
+            raise KeyError(id)
+        record = read_record(self.data, offset)
+        if record is None or record.id != id:
+            raise RecordException(f"index points past MED{id}")
+        return record
+
+    def __contains__(self, id: object) -> bool:
+        return isinstance(id, int) and self.offset(id) is not None
+
+    def ids(self) -> Iterator[int]:
+        return (id for id, _ in iter_slots(self.index))
+
+    def split(self, n: int) -> list[tuple[int, int]]:
+        """Cut the file into at most `n` byte ranges on record boundaries.
+
+        Ranges are balanced by bytes, and each can be read on its own with
+        `iter_records`, e.g. by a separate parse worker.
+        """
+        size = os.fstat(self.data.fileno()).st_size
+        offsets = sorted(set(iter_offsets(self.index)) | {0})
+        bounds = [0]
+        for k in range(1, n):
+            i = bisect.bisect_left(offsets, size * k // n)
+            if i < len(offsets) and offsets[i] > bounds[-1]:
+                bounds.append(offsets[i])
+        bounds.append(size)
+        return list(zip(bounds, bounds[1:]))
+
+
+def iter_records(
+    path: str | Path,
+    start: int = 0,
+    end: int | None = None,
+    latest: bool = False,
+) -> Iterator[Record]:
+    """Yield records starting within [start, end) in file order.
+
+    `start` has to be a record boundary, such as one given by `split`.
+    With `latest` set, records superseded by a later one of the same ID
+    are skipped.
+    """
+    current = None
+    if latest:
+        with open(index_name(path), "rb") as index:
+            current = set(iter_offsets(index))
+    with open(path, "rb") as f:
+        offset = start
+        while end is None or offset < end:
+            record = read_record(f, offset)
+            if record is None:
+                return
+            if current is None or offset in current:
+                yield record
+            offset += record.size
@@ -0,0 +1,79 @@
+"""Retrying transient crawl failures and recording the ones that persist."""
+
+# Standard library imports
+from __future__ import annotations
+from dataclasses import dataclass
+import datetime
+import email.utils
+import random
+from typing import Iterator, TextIO
+
+
+__all__ = ["DeadLetter", "RetryPolicy", "read_ids"]
+
+
+@dataclass(slots=True, frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    The n-th retry waits a random time between zero and `base * 2**n`
+    seconds, capped at `cap`. A Retry-After header sent with the response
+    takes precedence, up to `max_retry_after` seconds.
+    """
+
+    attempts: int = 4
+    base: float = 0.5
+    cap: float = 30.0
+    max_retry_after: float = 300.0
+    statuses: frozenset[int] = frozenset({408, 429, 500, 502, 503, 504})
+
+    def retries(self, attempt: int) -> bool:
+        """Tell whether a failed attempt (counted from zero) is retried."""
+        return attempt + 1 < self.attempts
+
+    def transient(self, status_code: int) -> bool:
+        return status_code in self.statuses
+
+    def delay(self, attempt: int, retry_after: str | None = None) -> float:
+        if retry_after is not None:
+            if (wait := parse_retry_after(retry_after)) is not None:
+                return min(wait, self.max_retry_after)
+        return random.uniform(0, min(self.cap, self.base * 2**attempt))
+
+
+def parse_retry_after(value: str) -> float | None:
+    """Return seconds to wait from delta-seconds or an HTTP date."""
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+class DeadLetter:
+    """IDs that failed for good, one `<id>\\t<reason>` line each.
+
+    The file can be passed straight back to `med-crawl --ids`.
+    """
+
+    def __init__(self, out: TextIO) -> None:
+        self.out = out
+
+    def put(self, id: int, reason: str) -> None:
+        self.out.write(f"{id}\t{reason}\n")
+        self.out.flush()
+
+
+def read_ids(f: TextIO) -> Iterator[int]:
+    """Yield MED IDs from the first column of a dead-letter or ID file."""
+    for line in f:
+        if not (fields := line.split()):
+            continue
+        head = fields[0]
+        yield int(head[3:] if head.startswith("MED") else head)
@@ -0,0 +1,54 @@
+"""Deterministic partitioning of the MED ID space across crawlers."""
+
+# Standard library imports
+from __future__ import annotations
+from dataclasses import dataclass
+import math
+from typing import Iterable, Iterator
+
+
+__all__ = ["Shard", "ShardException"]
+
+
+class ShardException(Exception):
+    ...
+
+
+@dataclass(slots=True, frozen=True)
+class Shard:
+    """Shard `index` of `count`, numbered from one.
+
+    Shard k takes the IDs that leave a remainder of k - 1 when divided by
+    the number of shards, so every shard gets a similar share of entries
+    and gaps wherever it runs.
+    """
+
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.index <= self.count:
+            raise ShardException(
+                f"shard {self.index}/{self.count} out of range"
+            )
+
+    @classmethod
+    def parse(cls, value: str) -> Shard:
+        index, sep, count = value.partition("/")
+        try:
+            return cls(int(index), int(count))
+        except ValueError:
+            raise ShardException(f"{value!r} is not of the form k/N")
+
+    def __contains__(self, id: int) -> bool:
+        return id % self.count == self.index - 1
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def filter(self, ids: Iterable[int]) -> Iterator[int]:
+        return (id for id in ids if id in self)
+
+    def budget(self, total: int) -> int:
+        """Split a budget shared by all shards, leaving at least one."""
+        return max(1, math.floor(total / self.count))
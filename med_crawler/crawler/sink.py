@@ -0,0 +1,130 @@
+"""Destinations for crawled MED entry pages."""
+
+# Standard library imports
+from __future__ import annotations
+import gzip
+import os
+from pathlib import Path
+import tempfile
+from typing import Protocol, TextIO, runtime_checkable
+
+# Local library imports
+from med_crawler.crawler.transport import WebContents
+from med_crawler.store import content_hash, iter_store, read_entry, store_id
+
+
+__all__ = [
+    "DirectorySink",
+    "Sink",
+    "StreamSink",
+    "iter_store",
+    "read_entry",
+]
+
+
+@runtime_checkable
+class Sink(Protocol):
+    def put(self, id: int, contents: WebContents) -> None:
+        raise NotImplementedError
+
+    async def drain(self) -> None:
+        """Wait until the sink is ready to take more pages."""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+
+class StreamSink:
+    """Pages written back to back into a single text stream."""
+
+    def __init__(self, out: TextIO) -> None:
+        self.out = out
+
+    def put(self, id: int, contents: WebContents) -> None:
+        self.out.write(contents.text)
+
+    async def drain(self) -> None:
+        return None
+
+    def flush(self) -> None:
+        self.out.flush()
+
+    def close(self) -> None:
+        self.flush()
+
+
+class DirectorySink:
+    """One file per entry under `root/<bucket>/MED<id>.<hash>.html[.gz]`.
+
+    Buckets group `bucket_size` consecutive IDs so that no directory grows
+    too large. The hash is taken from the page text, which lets the sink
+    leave files of unchanged pages alone and replace changed ones with an
+    atomic rename.
+    """
+
+    suffix = ".html"
+
+    def __init__(
+        self,
+        root: str | Path,
+        compress: bool = False,
+        bucket_size: int = 1000,
+    ) -> None:
+        self.root = Path(root)
+        self.compress = compress
+        self.bucket_size = bucket_size
+        self._buckets: dict[Path, dict[int, Path]] = {}
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, id: int, digest: str) -> Path:
+        name = f"MED{id}.{digest}{self.suffix}"
+        if self.compress:
+            name += ".gz"
+        return self.bucket(id) / name
+
+    def bucket(self, id: int) -> Path:
+        return self.root / f"{id // self.bucket_size:04d}"
+
+    def put(self, id: int, contents: WebContents) -> None:
+        data = contents.text.encode("utf-8")
+        path = self.path(id, content_hash(data))
+        existing = self._listing(path.parent)
+        previous = existing.get(id)
+        if previous == path:
+            return
+        if self.compress:
+            data = gzip.compress(data, mtime=0)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        existing[id] = path
+        if previous is not None:
+            previous.unlink(missing_ok=True)
+
+    async def drain(self) -> None:
+        return None
+
+    def flush(self) -> None:
+        return None
+
+    def close(self) -> None:
+        return None
+
+    def _listing(self, bucket: Path) -> dict[int, Path]:
+        if bucket not in self._buckets:
+            bucket.mkdir(exist_ok=True)
+            listing: dict[int, Path] = {}
+            for path in bucket.iterdir():
+                if (id := store_id(path)) is not None:
+                    listing[id] = path
+            self._buckets[bucket] = listing
+        return self._buckets[bucket]
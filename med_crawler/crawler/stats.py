@@ -0,0 +1,143 @@
+"""Streaming analysis of structured crawl logs."""
+
+# Standard library imports
+from __future__ import annotations
+from collections import Counter
+from dataclasses import dataclass
+import json
+import math
+from typing import Any, Iterable, Iterator, TextIO
+
+# Local library imports
+from med_crawler.crawler.metrics import Histogram
+
+
+__all__ = ["CrawlStats", "Window", "iter_events"]
+
+
+# From 1 ms to about a minute, each bucket 10% wider than the last, so
+# percentile estimates are within 10% whatever the number of requests.
+STATS_BUCKETS = tuple(0.001 * 1.1**k for k in range(116))
+
+# Events of an ID that failed; a page may download and then fail to parse.
+FAILURES = ("failed", "error", "parse_failed")
+
+
+@dataclass(slots=True)
+class Window:
+    start: float
+    length: float
+    pages: int = 0
+    bytes: int = 0
+    failures: int = 0
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.pages / self.length
+
+    def __str__(self) -> str:
+        return (
+            f"{self.start:.0f}\t{self.pages_per_sec:.2f} pages/s\t"
+            f"{self.bytes / self.length / 1024:.1f} KiB/s\t"
+            f"{self.failures} failed"
+        )
+
+
+def iter_events(lines: Iterable[str]) -> Iterator[dict[str, Any]]:
+    """Yield JSON log events, skipping lines of other log formats."""
+    for line in lines:
+        if not line.startswith("{"):
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+
+class CrawlStats:
+    """Aggregates of a JSON lines crawl log, read one event at a time.
+
+    Latency goes into a histogram of fixed buckets and throughput into
+    windows of `interval` seconds handed back as soon as they are over, so
+    memory does not grow with the log. Only IDs whose last outcome was a
+    failure are kept, to be crawled again; 404s count as missing instead.
+    """
+
+    def __init__(self, interval: float = 60.0) -> None:
+        self.interval = interval
+        self.latency = Histogram(STATS_BUCKETS)
+        self.events: Counter[str] = Counter()
+        self.failed: dict[int, str] = {}
+        self.missing = 0
+        self.first: float | None = None
+        self.last: float | None = None
+        self.window: Window | None = None
+
+    def feed(self, event: dict[str, Any]) -> Window | None:
+        """Account for an event; return the window it closed, if any."""
+        kind = event.get("event")
+        if kind is None:
+            return None
+        self.events[kind] += 1
+        if (latency := event.get("latency")) is not None:
+            self.latency.observe(latency)
+        match kind, event.get("status"):
+            case ("crawled" | "unchanged"), _:
+                self.failed.pop(event["id"], None)
+            case "failed", 404:
+                self.missing += 1
+                self.failed.pop(event["id"], None)
+            case "failed", status:
+                self.failed[event["id"]] = f"status code {status}"
+            case ("error" | "parse_failed"), _:
+                self.failed[event["id"]] = event.get("error", "")
+        return self._count(event, kind)
+
+    def _count(self, event: dict[str, Any], kind: str) -> Window | None:
+        when = event.get("time")
+        if when is None:
+            return None
+        self.first = when if self.first is None else self.first
+        self.last = when if self.last is None else max(self.last, when)
+        closed = None
+        start = self.first + self.interval * math.floor(
+            (when - self.first) / self.interval
+        )
+        if self.window is None or start > self.window.start:
+            closed, self.window = self.window, Window(start, self.interval)
+        if kind == "crawled":
+            self.window.pages += 1
+            self.window.bytes += event.get("bytes", 0)
+        elif kind in FAILURES and event.get("status") != 404:
+            self.window.failures += 1
+        return closed
+
+    def finish(self) -> Window | None:
+        """Return the last, possibly partial, window."""
+        window, self.window = self.window, None
+        if window is not None and self.last is not None:
+            window.length = max(self.last - window.start, 1e-9)
+        return window
+
+    @property
+    def elapsed(self) -> float:
+        if self.first is None or self.last is None:
+            return 0.0
+        return self.last - self.first
+
+    def report(self, out: TextIO) -> None:
+        pages = self.events["crawled"]
+        rate = pages / self.elapsed if self.elapsed else 0.0
+        out.write(
+            f"pages: {pages}, unchanged: {self.events['unchanged']}, "
+            f"missing: {self.missing}, failed: {len(self.failed)}, "
+            f"retries: {self.events['retry']}\n"
+        )
+        out.write(f"elapsed: {self.elapsed:.1f}s, {rate:.2f} pages/s\n")
+        summary = self.latency.summary()
+        out.write(
+            f"latency over {summary['count']} requests: "
+            f"p50 {summary['p50'] * 1e3:.1f} ms, "
+            f"p95 {summary['p95'] * 1e3:.1f} ms, "
+            f"p99 {summary['p99'] * 1e3:.1f} ms\n"
+        )
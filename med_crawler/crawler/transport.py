@@ -0,0 +1,166 @@
+"""HTTP transports used by the Middle English Dictionary crawler."""
+
+# Standard library imports
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass, field
+import enum
+import requests
+from typing import Any, Mapping, Protocol
+
+# Third-party library imports
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None  # type: ignore
+
+
+__all__ = [
+    "TRANSIENT_ERRORS",
+    "AiohttpTransport",
+    "ThreadTransport",
+    "Transport",
+    "TransportKind",
+    "WebContents",
+    "fetch_sync",
+    "make_transport",
+]
+
+
+class TransportError(Exception):
+    ...
+
+
+# Failures worth another attempt; requests exceptions derive from OSError.
+TRANSIENT_ERRORS: tuple[type[BaseException], ...] = (
+    OSError,
+    asyncio.TimeoutError,
+)
+if aiohttp is not None:
+    TRANSIENT_ERRORS += (aiohttp.ClientError,)
+
+
+@dataclass(slots=True, frozen=True)
+class WebContents:
+    text: str
+    status_code: int
+    headers: Mapping[str, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+
+class Transport(Protocol):
+    async def get(
+        self, url: str, headers: Mapping[str, str] | None = None
+    ) -> WebContents:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        raise NotImplementedError
+
+
+class TransportKind(str, enum.Enum):
+    auto = AUTO = "auto"
+    aiohttp = AIOHTTP = "aiohttp"
+    thread = THREAD = "thread"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+def fetch_sync(
+    url: str, headers: Mapping[str, str] | None = None
+) -> WebContents:
+    response = requests.get(url, headers=headers)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        return WebContents("", response.status_code, response.headers)
+    else:
+        return WebContents(
+            response.text, response.status_code, response.headers
+        )
+
+
+class ThreadTransport:
+    """Blocking requests pushed onto the default thread executor."""
+
+    async def get(
+        self, url: str, headers: Mapping[str, str] | None = None
+    ) -> WebContents:
+        return await asyncio.to_thread(fetch_sync, url, headers)
+
+    async def close(self) -> None:
+        return None
+
+
+class AiohttpTransport:
+    """Native asyncio client holding a bounded pool of keep-alive sockets.
+
+    The session is opened lazily so that it binds to the event loop that
+    actually runs the crawl.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 5,
+        timeout: float = 60.0,
+        keepalive_timeout: float = 30.0,
+    ) -> None:
+        if aiohttp is None:
+            raise TransportError("aiohttp is not installed")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Any = None
+
+    def _get_session(self) -> Any:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def get(
+        self, url: str, headers: Mapping[str, str] | None = None
+    ) -> WebContents:
+        session = self._get_session()
+        async with session.get(url, headers=headers) as response:
+            if response.status >= 400:
+                await response.release()
+                return WebContents("", response.status, response.headers)
+            text = await response.text()
+            return WebContents(text, response.status, response.headers)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+def make_transport(
+    kind: TransportKind | str = TransportKind.AUTO, pool_size: int = 5
+) -> Transport:
+    match TransportKind(kind):
+        case TransportKind.AUTO:
+            if aiohttp is None:
+                return ThreadTransport()
+            return AiohttpTransport(pool_size=pool_size)
+        case TransportKind.AIOHTTP:
+            return AiohttpTransport(pool_size=pool_size)
+        case TransportKind.THREAD:
+            return ThreadTransport()
+        case _:
+            raise TransportError(f"{str(kind)} not supported")
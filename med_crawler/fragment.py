@@ -0,0 +1,41 @@
+"""Dictionary entry fragments cut out of whole MED pages."""
+
+# Standard library imports
+from __future__ import annotations
+import re
+import xml.parsers.expat
+
+
+__all__ = ["ENTRY_TAG", "entry_fragment", "is_well_formed"]
+
+
+ENTRY_TAG = "entryfree"
+
+_START = re.compile(rf"<{ENTRY_TAG}[\s/>]", re.IGNORECASE)
+_END = re.compile(rf"</{ENTRY_TAG}\s*>", re.IGNORECASE)
+
+
+def entry_fragment(text: str) -> str | None:
+    """Return the `<entryfree>` element of a page, or None if it has none.
+
+    The element is found with two string searches rather than a parse; it
+    does not nest, so the first closing tag after the opening one ends it.
+    """
+    start = _START.search(text)
+    if start is None:
+        return None
+    end = _END.search(text, start.end())
+    if end is None:
+        return None
+    return text[start.start() : end.end()]
+
+
+def is_well_formed(fragment: str) -> bool:
+    """Check that tags balance, tolerating entities XML does not define."""
+    parser = xml.parsers.expat.ParserCreate()
+    parser.UseForeignDTD(True)
+    try:
+        parser.Parse(fragment, True)
+    except xml.parsers.expat.ExpatError:
+        return False
+    return True
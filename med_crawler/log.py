@@ -3,7 +3,11 @@
 # Standard library imports
 import datetime
 import enum
-from typing import Generator, TextIO, Protocol, ClassVar
+import json
+import queue
+import threading
+import time
+from typing import Any, Generator, TextIO, Protocol, ClassVar
 
 
 class LoggingError(Exception):
@@ -17,35 +21,155 @@ class Level(str, enum.Enum):
 
 
 class Logger(Protocol):
-    def log(self, msg: str, lvl: Level) -> None:
+    def log(self, msg: str, lvl: Level, **fields: Any) -> None:
+        """Log a message; `fields` describe it for structured logs."""
         raise NotImplementedError
 
 
+date_fmt = "%y-%m-%d %H:%M:%S.%f"
+
+
+def format_line(
+    n: int, msg: str, lvl: Level, when: float | None = None
+) -> str:
+    if when is None:
+        return f"{n}::{lvl.value}::{msg}\n"
+    time = datetime.datetime.fromtimestamp(when).strftime(date_fmt)
+    return f"{n}::{lvl.value}::{time}::{msg}\n"
+
+
 class CrawlerLogger:
-    date_fmt: ClassVar[str] = "%y-%m-%d %H:%M:%S.%f"
+    date_fmt: ClassVar[str] = date_fmt
 
     def __init__(self, out: TextIO, include_date: bool = True) -> None:
         self.out = out
         self.include_date = include_date
         self.counter = count(0, 1)
 
-    def log(self, msg: str, lvl: Level) -> None:
+    def log(self, msg: str, lvl: Level, **fields: Any) -> None:
         match lvl:
             case lvl.ok | lvl.error | lvl.warning:
-                if self.include_date:
-                    time = datetime.datetime.now().strftime(self.date_fmt)
-                    self.out.write(
-                        f"{next(self.counter)}::{format(lvl)}::{time}::{msg}\n"
-                    )
-                else:
-                    self.out.write(
-                        f"{next(self.counter)}::{format(lvl)}::{msg}\n"
-                    )
+                when = time.time() if self.include_date else None
+                self.out.write(format_line(next(self.counter), msg, lvl, when))
                 self.out.flush()
             case _:
                 raise LoggingError(f"{str(lvl)} not supported")
 
 
+class QueueLogger:
+    """Logger formatting and writing messages on a background thread.
+
+    `log` only puts the message on a queue, so it never blocks the event
+    loop. The thread writes messages in batches and flushes the output
+    once `batch_size` messages are pending or `flush_interval` seconds have
+    passed, and on `close`.
+    """
+
+    def __init__(
+        self,
+        out: TextIO,
+        include_date: bool = True,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.out = out
+        self.include_date = include_date
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: queue.SimpleQueue[
+            tuple[str, Level, float | None, dict[str, Any]] | None
+        ] = queue.SimpleQueue()
+        self.error: BaseException | None = None
+        self.thread = threading.Thread(
+            target=self._run, name="med-crawl-log", daemon=True
+        )
+        self.thread.start()
+
+    def __enter__(self) -> "QueueLogger":
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback) -> None:
+        self.close()
+
+    def log(self, msg: str, lvl: Level, **fields: Any) -> None:
+        if not isinstance(lvl, Level):
+            raise LoggingError(f"{str(lvl)} not supported")
+        when = time.time() if self.include_date else None
+        self.queue.put((msg, lvl, when, fields))
+
+    def format(
+        self,
+        n: int,
+        msg: str,
+        lvl: Level,
+        when: float | None,
+        fields: dict[str, Any],
+    ) -> str:
+        return format_line(n, msg, lvl, when)
+
+    def close(self) -> None:
+        """Write out every queued message and stop the thread."""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        if self.error is not None:
+            raise LoggingError("failed to write log") from self.error
+
+    def _run(self) -> None:
+        counter = count(0, 1)
+        pending, deadline = 0, 0.0
+        try:
+            while True:
+                try:
+                    if pending:
+                        timeout = max(0.0, deadline - time.monotonic())
+                        item = self.queue.get(timeout=timeout)
+                    else:
+                        item = self.queue.get()
+                except queue.Empty:
+                    self.out.flush()
+                    pending = 0
+                    continue
+                if item is None:
+                    return
+                self.out.write(self.format(next(counter), *item))
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                pending += 1
+                if pending >= self.batch_size or time.monotonic() >= deadline:
+                    self.out.flush()
+                    pending = 0
+        except Exception as err:
+            self.error = err
+        finally:
+            try:
+                self.out.flush()
+            except Exception as err:
+                self.error = self.error or err
+
+
+class JsonLogger(QueueLogger):
+    """Background logger writing one JSON object per line.
+
+    Every object has the message number, Unix time, level and message,
+    and the fields it was logged with, such as `event` and `id`.
+    """
+
+    def format(
+        self,
+        n: int,
+        msg: str,
+        lvl: Level,
+        when: float | None,
+        fields: dict[str, Any],
+    ) -> str:
+        record = {"n": n, "time": when, "level": lvl.value, "msg": msg}
+        if when is None:
+            del record["time"]
+        record.update(fields)
+        return json.dumps(record) + "\n"
+
+
 def count(start: int = 0, step: int = 1) -> Generator[int, None, None]:
     while True:
         yield start
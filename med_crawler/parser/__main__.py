@@ -2,18 +2,21 @@
 
 # Standard library imports
 import argparse
-import json
-from typing import Text
+from typing import Iterable, Iterator, Text
 from pathlib import Path
 from enum import Enum
 
-# Third-party library imports
-from tqdm import tqdm
-
 # Local library imports
+from med_crawler.crawler.archive import iter_archive
+from med_crawler.crawler.records import RecordFile, iter_records
+from med_crawler.crawler.retry import read_ids
+from med_crawler.store import iter_store
 from med_crawler.parser import Parser, ParsingStrategy
-from med_crawler.parser.db import SqliteMedDB, SqliteMedDbException
-from med_crawler.parser.parser import Citation, Entry, Etymology, Form, Pos, Sense
+from med_crawler.parser.writer import (
+    EntryWriter,
+    JsonEntryWriter,
+    SqliteEntryWriter,
+)
 
 
 class OutputFormat(str, Enum):
@@ -35,10 +38,30 @@ def get_args() -> argparse.Namespace:
     parser.add_argument(
         "-d",
         "--dir",
-        help="directory with MED XML files",
+        help="directory with MED XML files; may be a med-crawl store",
         type=lambda x: Path(x),
         dest="input_dir",
     )
+    parser.add_argument(
+        "-a",
+        "--archive",
+        help="med-crawl archive written with --format warc",
+        type=lambda x: Path(x),
+        dest="input_archive",
+    )
+    parser.add_argument(
+        "-r",
+        "--records",
+        help="med-crawl output written with --format records",
+        type=lambda x: Path(x),
+        dest="input_records",
+    )
+    parser.add_argument(
+        "--ids",
+        help="parse only the IDs listed in a file; requires --records",
+        type=argparse.FileType("r"),
+        default=None,
+    )
     parser.add_argument(
         "-o",
         "--output",
@@ -54,56 +77,57 @@ def get_args() -> argparse.Namespace:
         default=OutputFormat.JSON,
     )
     result = parser.parse_args()
+    inputs = (result.input_dir, result.input_archive, result.input_records)
+    if all(i is None for i in inputs):
+        parser.error("one of --dir, --archive or --records is required")
+    if result.ids is not None and result.input_records is None:
+        parser.error("--ids requires --records")
     return result
 
 
 def parse(args: argparse.Namespace) -> None:
-    contents: list[Text] = []
-    for fname in args.input_dir.iterdir():
-        with open(fname, "r") as f:
-            contents.append(f.read())
-    p = Parser(ParsingStrategy.lxml)
-    match args.format:
-        case OutputFormat.JSON:
-            result = json.dumps(
-                [entry.as_dict() for entry in p.parse(contents, args.verbose)]
-            )
-            with open(args.output, "w") as f:
-                f.write(result)
-        case OutputFormat.SQLITE:
-            entries = p.parse(contents, args.verbose)
-            populate_db(args.output, entries)
-        case _:
-            raise Exception
-
-
-def populate_db(file_name: str, entries: list[Entry]) -> None:
+    with Parser(ParsingStrategy.lxml) as p:
+        match args.format:
+            case OutputFormat.JSON:
+                with open(args.output, "w") as f:
+                    write(p, sources(args), JsonEntryWriter(f), args.verbose)
+            case OutputFormat.SQLITE:
+                writer = SqliteEntryWriter(args.output)
+                write(p, sources(args), writer, args.verbose)
+            case _:
+                raise Exception
+
+
+def write(
+    p: Parser,
+    sources: Iterable[Text | Path],
+    writer: EntryWriter,
+    verbose: bool = False,
+) -> None:
+    """Parse into `writer`, with entries serialized by the workers."""
     try:
-        with SqliteMedDB(file_name=file_name) as db:
-            db.create_tables()
-            entry: Entry
-            for entry in tqdm(
-                entries,
-                desc=f"Writing Middle English Dictionary to {file_name}",
-            ):
-                db.insert_to_entry_table(entry.as_dto())
-                pos: Pos
-                for pos in entry.pos:
-                    db.insert_to_pos_table(pos.as_dto(entry.id))
-                etymology: Etymology
-                for etymology in entry.etymologies:
-                    db.insert_to_etymology_table(etymology.as_dto(entry.id))
-                form: Form
-                for form in entry.forms:
-                    db.insert_to_form_table(form.as_dto(entry.id))
-                sense: Sense
-                for sense in entry.senses:
-                    db.insert_to_sense_table(sense.as_dto(entry.id))
-                citation: Citation
-                for citation in entry.citations:
-                    db.insert_to_citation_table(citation.as_dto(entry.id))
-    except SqliteMedDbException as err:
-        raise err
+        for dumped in p.iter_dump(sources, writer.dump, verbose):
+            writer.write_dump(dumped)
+    finally:
+        writer.close()
+
+
+def sources(args: argparse.Namespace) -> Iterator[Text | Path]:
+    """Yield documents to parse one at a time; files are read by parsers."""
+    if args.input_records is not None and args.ids is not None:
+        with RecordFile(args.input_records) as records, args.ids as f:
+            for id in read_ids(f):
+                if id in records:
+                    yield records[id].text
+    elif args.input_records is not None:
+        for rec in iter_records(args.input_records, latest=True):
+            yield rec.text
+    elif args.input_archive is not None:
+        for record in iter_archive(args.input_archive, latest=True):
+            if record.status_code == 200:
+                yield record.text
+    else:
+        yield from iter_store(args.input_dir)
 
 
 def main() -> None:
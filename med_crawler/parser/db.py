@@ -2,8 +2,10 @@
 
 # Standard library imports
 from __future__ import annotations
+import itertools
 import sqlite3
 import logging
+from typing import Any, Iterable
 
 # Local library imports
 from med_crawler.parser.parser import (
@@ -19,6 +21,48 @@ from med_crawler.parser.parser import (
 logger = logging.Logger(__name__)
 
 
+# Columns of each table, in the order of the values of rows.
+COLUMNS: dict[str, tuple[str, ...]] = {
+    "entry": ("id", "source_id", "lemma_regular", "lemma_original"),
+    "pos": ("id", "entry_id", "code", "code_abbrev"),
+    "etymology": ("id", "entry_id", "code", "code_abbrev"),
+    "form": ("id", "entry_id", "form_regular", "form_original"),
+    "sense": ("id", "entry_id", "text"),
+    "citation": (
+        "id",
+        "entry_id",
+        "date",
+        "author",
+        "title",
+        "manuscript",
+        "scope",
+        "text",
+        "reference",
+    ),
+}
+
+Rows = dict[str, list[tuple[Any, ...]]]
+
+
+def entry_rows(entry: Entry) -> Rows:
+    """Turn an entry into rows of each table, e.g. in a parser worker."""
+    parts: dict[str, Iterable[Any]] = {
+        "pos": entry.pos,
+        "etymology": entry.etymologies,
+        "form": entry.forms,
+        "sense": entry.senses,
+        "citation": entry.citations,
+    }
+    rows: Rows = {"entry": [_row("entry", entry.as_dto())]}
+    for table, items in parts.items():
+        rows[table] = [_row(table, i.as_dto(entry.id)) for i in items]
+    return rows
+
+
+def _row(table: str, dto: Any) -> tuple[Any, ...]:
+    return tuple(dto[column] for column in COLUMNS[table])
+
+
 class SqliteMedDbException(Exception):
     """SqliteMedDbException"""
 
@@ -43,6 +87,50 @@ class SqliteMedDB:
     def __exit__(self, exc_type, exc_val, traceback) -> None:
         self.conn.close()
 
+    def insert_entry(self, entry: Entry) -> None:
+        self.insert_rows([entry_rows(entry)])
+
+    def insert_rows(self, batch: Iterable[Rows]) -> list[str]:
+        """Insert rows of many entries with one statement per table.
+
+        The batch goes in as a single transaction. If it breaks a
+        constraint, say with a repeated source ID, the entries go in one
+        at a time instead and those breaking it are logged and skipped.
+        Return the IDs of the skipped entries.
+        """
+        batch = list(batch)
+        try:
+            self._insert(batch)
+            return []
+        except sqlite3.IntegrityError:
+            pass
+        except sqlite3.Error as err:
+            logger.error(f"Sqlite DB error: {err}")
+            raise SqliteMedDbInsertException(err) from err
+        skipped: list[str] = []
+        for rows in batch:
+            try:
+                self._insert([rows])
+            except sqlite3.IntegrityError as err:
+                id = rows["entry"][0][0]
+                logger.error(f"Sqlite DB error: skipped entry {id}: {err}")
+                skipped.append(id)
+            except sqlite3.Error as err:
+                logger.error(f"Sqlite DB error: {err}")
+                raise SqliteMedDbInsertException(err) from err
+        return skipped
+
+    def _insert(self, batch: list[Rows]) -> None:
+        with self.conn:
+            for table, columns in COLUMNS.items():
+                self.conn.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))});",
+                    itertools.chain.from_iterable(
+                        rows[table] for rows in batch
+                    ),
+                )
+
     def create_tables(self) -> None:
         for create_table in (
            self._create_lemma_table,
@@ -2,27 +2,53 @@
 
 # Standard library imports
 from __future__ import annotations
-from dataclasses import dataclass
+import concurrent.futures
+from dataclasses import dataclass, field, fields
 import enum
-from functools import partial
+import itertools
+import math
 import multiprocessing
-from typing import Any, Text, TypedDict
-from uuid import uuid4
+from pathlib import Path
+import sys
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Sized,
+    Text,
+    TypedDict,
+    TypeVar,
+)
 
 # Third-party library imports
 from bs4 import BeautifulSoup
+from lxml import etree
 from tqdm import tqdm
 
+# Local library imports
+from med_crawler.fragment import entry_fragment
+from med_crawler.store import read_entry
+
 
 __all__ = ["Entry", "Parser", "ParsingStrategy"]
 
 
+T = TypeVar("T")
+
+
 class ParsingException(Exception):
     ...
 
 
-@dataclass
+@dataclass(slots=True)
 class Entry:
+    """A dictionary entry.
+
+    IDs follow from the source ID and the position of each part, so they
+    are the same every time a page is parsed. The parts get theirs here.
+    """
+
     source_id: str
     headword: Form
     pos: list[Pos]
@@ -48,11 +74,21 @@ class Entry:
         citations: list[Citation.Dict]
 
     def __post_init__(self) -> None:
-        self._uuid = uuid4()
+        self.headword._id = f"{self.source_id}.form.0"
+        parts: list[tuple[str, list[Any]]] = [
+            ("pos", self.pos),
+            ("etym", self.etymologies),
+            ("form", self.forms),
+            ("sense", self.senses),
+            ("cit", self.citations),
+        ]
+        for kind, items in parts:
+            for n, item in enumerate(items):
+                item._id = f"{self.source_id}.{kind}.{n}"
 
     @property
     def id(self) -> str:
-        return str(self._uuid)
+        return self.source_id
 
     def as_dict(self) -> Dict:
         headword = self.headword.as_dict()
@@ -79,11 +115,12 @@ class Entry:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Form:
     headword: bool
     regular: str
     original: str
+    _id: str = field(default="", init=False, repr=False, compare=False)
 
     class DTO(TypedDict):
         id: str
@@ -98,12 +135,9 @@ class Form:
         original: str
 
 
-    def __post_init__(self) -> None:
-        self._uuid = uuid4()
-
     @property
     def id(self) -> str:
-        return str(self._uuid)
+        return self._id
 
     def as_dict(self) -> Dict:
         return {
@@ -122,10 +156,11 @@ class Form:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Pos:
     code: str
     code_abbrev: str
+    _id: str = field(default="", init=False, repr=False, compare=False)
 
     class DTO(TypedDict):
         id: str
@@ -139,11 +174,13 @@ class Pos:
         code_abbrev: str | None
 
     def __post_init__(self) -> None:
-        self._uuid = uuid4()
+        # A small set of codes recurs across the whole dictionary.
+        self.code = sys.intern(self.code)
+        self.code_abbrev = sys.intern(self.code_abbrev)
 
     @property
     def id(self) -> str:
-        return str(self._uuid)
+        return self._id
 
     def as_dict(self) -> Dict:
         return {
@@ -161,10 +198,11 @@ class Pos:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Etymology:
     code: str
     code_abbrev: str
+    _id: str = field(default="", init=False, repr=False, compare=False)
 
     class DTO(TypedDict):
         id: str
@@ -178,11 +216,12 @@ class Etymology:
         code_abbrev: str | None
 
     def __post_init__(self) -> None:
-        self._uuid = uuid4()
+        self.code = sys.intern(self.code)
+        self.code_abbrev = sys.intern(self.code_abbrev)
 
     @property
     def id(self) -> str:
-        return str(self._uuid)
+        return self._id
 
     def as_dict(self) -> Dict:
         return {
@@ -200,9 +239,10 @@ class Etymology:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Sense:
     text: str
+    _id: str = field(default="", init=False, repr=False, compare=False)
 
     class DTO(TypedDict):
         id: str
@@ -213,12 +253,9 @@ class Sense:
         id: str
         text: str
 
-    def __post_init__(self) -> None:
-        self._uuid = uuid4()
-
     @property
     def id(self) -> str:
-        return str(self._uuid)
+        return self._id
 
     def as_dict(self) -> Dict:
         return {
@@ -234,7 +271,7 @@ class Sense:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Citation:
     date: str
     author: str
@@ -243,6 +280,7 @@ class Citation:
     scope: str
     text: str
     reference: str
+    _id: str = field(default="", init=False, repr=False, compare=False)
 
     class DTO(TypedDict):
         id: str
@@ -267,18 +305,19 @@ class Citation:
         reference: str | None
 
     def __post_init__(self) -> None:
-        self._uuid = uuid4()
+        # Dates, authors, titles and manuscripts recur across citations.
+        self.date = sys.intern(self.date)
+        self.author = sys.intern(self.author)
+        self.title = sys.intern(self.title)
+        self.ms = sys.intern(self.ms)
 
     @property
     def id(self) -> str:
-        return str(self._uuid)
+        return self._id
 
     def is_empty(self) -> bool:
         return not any(
-            [
-                getattr(self, attr, None)
-                for attr in self.__dataclass_fields__.keys()
-            ]
+            [getattr(self, f.name, None) for f in fields(self) if f.init]
         )
 
     def as_dict(self) -> Dict:
@@ -314,45 +353,204 @@ class EmptySpan:
 class ParsingStrategy(str, enum.Enum):
     html = HTML = "html.parser"
     lxml = LXML = "lxml"
+    xpath = XPATH = "xpath"
+    events = EVENTS = "events"
 
 
 class Parser:
+    """Parser of MED pages running on a pool of worker processes.
+
+    The pool is started on first use and kept until `close`, so repeated
+    calls do not pay for starting and warming up workers again. Use the
+    parser as a context manager to close it. Documents are sent to the
+    workers in chunks of about `chunk_size` bytes.
+    """
+
     def __init__(
         self,
         strategy: ParsingStrategy = ParsingStrategy.lxml,
+        processes: int | None = None,
+        chunk_size: int = 1 << 18,
     ) -> None:
+        if processes is None:
+            n_cpus = multiprocessing.cpu_count()
+            processes = n_cpus - 1 if n_cpus > 1 else 1
         self.strategy = strategy
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self._pool: concurrent.futures.ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> Parser:
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback) -> None:
+        self.close()
+
+    @property
+    def pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                self.processes,
+                initializer=warm_up,
+                initargs=(self.strategy,),
+            )
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
 
     def parse(
         self, contents: list[Text], verbose: bool = False
     ) -> list[Entry]:
-        entries: list[Entry] = []
+        return list(self.iter_parse(contents, verbose))
 
-        if not contents:
-            return entries
+    def iter_parse(
+        self,
+        sources: Iterable[Text | Path],
+        verbose: bool = False,
+        max_pending: int | None = None,
+    ) -> Iterator[Entry]:
+        """Parse documents or files lazily, yielding entries as they finish.
+
+        Sources are drawn only as workers free up, with at most
+        `max_pending` chunks (by default twice the number of workers) in
+        flight, so memory does not depend on the number of sources. Files
+        given as paths are read by the workers.
+        """
+        return self._iter(sources, None, verbose, max_pending)
+
+    def iter_dump(
+        self,
+        sources: Iterable[Text | Path],
+        dump: Callable[[Entry], T],
+        verbose: bool = False,
+        max_pending: int | None = None,
+    ) -> Iterator[T]:
+        """Like `iter_parse`, but yield what `dump` makes of each entry.
+
+        `dump` runs in the workers, so entries serialized there, as JSON
+        or as database rows, come back ready to write instead of as object
+        graphs to unpickle and serialize again in this process. It has to
+        be picklable, that is a module-level function.
+        """
+        return self._iter(sources, dump, verbose, max_pending)
+
+    def _iter(
+        self,
+        sources: Iterable[Text | Path],
+        dump: Callable[[Entry], Any] | None,
+        verbose: bool,
+        max_pending: int | None,
+    ) -> Iterator[Any]:
+        max_pending = max_pending or 2 * self.processes
+        total = len(sources) if isinstance(sources, Sized) else None
+        bar = tqdm(
+            total=total,
+            desc="Parsing Middle English Dictionary",
+            disable=not verbose,
+        )
+        chunks = self.chunks(sources)
+        pending: set[concurrent.futures.Future[list[Any]]] = set()
+        with bar:
+            for chunk in itertools.islice(chunks, max_pending):
+                pending.add(self.submit(chunk, dump))
+            try:
+                while pending:
+                    done, pending = concurrent.futures.wait(
+                        pending,
+                        return_when=concurrent.futures.FIRST_COMPLETED,
+                    )
+                    for future in done:
+                        for chunk in itertools.islice(chunks, 1):
+                            pending.add(self.submit(chunk, dump))
+                        results = future.result()
+                        bar.update(len(results))
+                        yield from results
+            finally:
+                # Stopped early or failed: drop what has not started yet.
+                for future in pending:
+                    future.cancel()
+
+    def submit(
+        self,
+        chunk: list[Text | Path],
+        dump: Callable[[Entry], Any] | None = None,
+    ) -> concurrent.futures.Future[list[Any]]:
+        return self.pool.submit(parse_chunk, chunk, self.strategy, dump)
+
+    def chunks(
+        self, sources: Iterable[Text | Path]
+    ) -> Iterator[list[Text | Path]]:
+        """Group sources into chunks of about `chunk_size` bytes.
+
+        When the number of sources is known, chunks are also kept small
+        enough to give every worker a few of them.
+        """
+        limit = None
+        if isinstance(sources, Sized):
+            limit = max(1, math.ceil(len(sources) / (4 * self.processes)))
+        chunk: list[Text | Path] = []
+        size = 0
+        for source in sources:
+            chunk.append(source)
+            size += source_size(source)
+            if size >= self.chunk_size or len(chunk) == limit:
+                yield chunk
+                chunk, size = [], 0
+        if chunk:
+            yield chunk
+
+
+def source_size(source: Text | Path) -> int:
+    if isinstance(source, Path):
+        return source.stat().st_size
+    return len(source)
+
+
+def warm_up(strategy: ParsingStrategy) -> None:
+    """Load the parser modules of a worker before the first real page."""
+    document = '<entryfree id="MED0"></entryfree>'
+    if strategy in (ParsingStrategy.XPATH, ParsingStrategy.EVENTS):
+        html_tree(document)
+    else:
+        BeautifulSoup(document, strategy)
+
+
+def parse_chunk(
+    chunk: list[Text | Path],
+    strategy: ParsingStrategy,
+    dump: Callable[[Entry], Any] | None = None,
+) -> list[Any]:
+    entries = [parse_source(source, strategy) for source in chunk]
+    if dump is None:
+        return entries
+    return [dump(entry) for entry in entries]
 
-        n_cpus = multiprocessing.cpu_count()
-        pool = multiprocessing.Pool(processes=n_cpus - 1 if n_cpus > 1 else 1)
 
-        if verbose:
-            iter = tqdm(
-                pool.imap_unordered(
-                    partial(parse_single, strategy=self.strategy), contents
-                ),
-                total=len(contents),
-                desc="Parsing Middle English Dictionary",
-            )
-            entries.extend(list(iter))
-        else:
-            entries.extend(
-                pool.imap_unordered(
-                    partial(parse_single, strategy=self.strategy), contents
-                )
-            )
-        return entries
+def parse_source(source: Text | Path, strategy: ParsingStrategy) -> Entry:
+    if isinstance(source, Path):
+        source = read_entry(source)
+    return parse_single(source, strategy)
+
+
+def entry_region(content: Text) -> Text:
+    """Cut a page down to its `<entryfree>` element before it is parsed.
+
+    All that is extracted lies within the element, so the head, scripts
+    and navigation of a whole page need not go into a tree. Pages without
+    the element, or with it cut off, are left whole.
+    """
+    return entry_fragment(content) or content
 
 
 def parse_single(content: Text, strategy: ParsingStrategy) -> Entry:
+    content = entry_region(content)
+    if strategy == ParsingStrategy.XPATH:
+        return Entry(**XPathExtract(html_tree(content))())
+    if strategy == ParsingStrategy.EVENTS:
+        return Entry(**event_extract(content))
     soup = BeautifulSoup(content, strategy)
     result = Entry(**Extract(soup)())
     return result
@@ -473,6 +671,337 @@ class Extract:
         return citations
 
 
+HTML_PARSER = etree.HTMLParser(encoding="utf-8")
+
+
+def html_tree(content: Text) -> etree._Element:
+    """Parse a page the way BeautifulSoup does with the lxml builder."""
+    root = etree.fromstring(content.encode("utf-8"), HTML_PARSER)
+    if root is None:
+        raise ParsingException("empty document")
+    return root
+
+
+def _first(name: str) -> etree.XPath:
+    return etree.XPath(f"(.//{name})[1]")
+
+
+def _text(name: str) -> etree.XPath:
+    return etree.XPath(f"string((.//{name})[1])")
+
+
+class XPathExtract:
+    """Extract with precompiled XPath over an lxml tree.
+
+    Gives the same results as `Extract` over a soup built with the lxml
+    builder, without building the soup: `find` becomes the first matching
+    descendant and `.text` the XPath string value.
+    """
+
+    source_id = etree.XPath("(//entryfree)[1]/@id")
+    hdorth = etree.XPath("(//hdorth)[1]")
+    ps = etree.XPath("(//pos)[1]//ps")
+    orth = etree.XPath("//orth")
+    lang = etree.XPath("(//etym)[1]//lang")
+    lg = _first("lg")
+    defs = etree.XPath("(//sense)[1]//def")
+    cit = etree.XPath("//cit")
+    stncl = _first("stncl")
+    reg, orig = _first("reg"), _text("orig")
+    date, author, title = _text("date"), _text("author"), _text("title")
+    ms, scope, q = _text("ms"), _text("scope"), _text("q")
+    string = etree.XPath("string()")
+
+    def __init__(self, root: etree._Element) -> None:
+        self.root = root
+
+    def __call__(self) -> dict[str, Any]:
+        hdorth = self._one(self.hdorth(self.root), "hdorth")
+        headword = self._headword(hdorth)
+        result = {
+            "source_id": self._one(self.source_id(self.root), "entryfree"),
+            "headword": headword,
+            "pos": self._find_pos(),
+            "etymologies": self._find_etymologies(),
+            "forms": self._find_forms(headword),
+            "senses": self._find_senses(),
+            "citations": self._find_citations(),
+        }
+        return result
+
+    @staticmethod
+    def _one(nodes: list[Any], name: str) -> Any:
+        if not nodes:
+            raise ParsingException(f"no <{name}> in entry")
+        return nodes[0]
+
+    def _headword(self, hdorth: etree._Element) -> Form:
+        return Form(
+            headword=True,
+            regular=self.string(self._one(self.reg(hdorth), "reg")).strip(),
+            original=self.orig(hdorth).strip(),
+        )
+
+    def _find_pos(self) -> list[Pos]:
+        return [
+            Pos(
+                code=ps.get("expan").lower().strip(),
+                code_abbrev=self.string(ps).lower().strip(),
+            )
+            for ps in self.ps(self.root)
+        ]
+
+    def _find_forms(self, headword: Form) -> list[Form]:
+        result = [Form(True, headword.regular, headword.original)]
+        for ort in self.orth(self.root):
+            reg = self._one(self.reg(ort), "reg")
+            result.append(
+                Form(
+                    headword=False,
+                    regular=self.string(reg).strip(),
+                    # Like Extract, forms take the headword's original.
+                    original=headword.original,
+                )
+            )
+        return result
+
+    def _find_etymologies(self) -> list[Etymology]:
+        etymologies: list[Etymology] = []
+        for lang in self.lang(self.root):
+            lg = self.lg(lang)
+            etymologies.append(
+                Etymology(
+                    code=lg[0].get("expan", "").lower().strip() if lg else "",
+                    code_abbrev=(
+                        self.string(lg[0]).lower().strip() if lg else ""
+                    ),
+                )
+            )
+        return etymologies
+
+    def _find_senses(self) -> list[Sense]:
+        return [
+            Sense(text=self.string(d).strip()) for d in self.defs(self.root)
+        ]
+
+    def _find_citations(self) -> list[Citation]:
+        citations: list[Citation] = []
+        for cit in self.cit(self.root):
+            stncl = self.stncl(cit)
+            citations.append(
+                Citation(
+                    date=self.date(cit).strip(),
+                    author=self.author(cit).strip(),
+                    title=self.title(cit).strip(),
+                    ms=self.ms(cit).strip(),
+                    scope=self.scope(cit).strip(),
+                    text=_remove_mulitple_whitespace(
+                        self.q(cit).strip().replace("|", "")
+                    ),
+                    reference=stncl[0].get("rid", "") if stncl else "",
+                )
+            )
+        return citations
+
+
+@dataclass(slots=True)
+class _Node:
+    """An element the event extractor keeps while it is open."""
+
+    tag: str
+    attrib: dict[str, str]
+    parts: list[str] = field(default_factory=list)
+    fields: dict[str, _Node] = field(default_factory=dict)
+    index: int = -1
+
+
+def _string(node: _Node | None) -> str:
+    return "".join(node.parts) if node is not None else ""
+
+
+class EventExtract:
+    """Extract in a single pass over the events of the lxml HTML parser.
+
+    Used as the target of the parser, so no tree is built. Items (a form,
+    a part of speech, a citation...) open as their start tags come in,
+    take the first of their fields found before they close, and collect
+    the text of the elements whose string value is needed. Items are
+    built as soon as they close, so besides the entry being built only
+    the elements open at the time are kept in memory.
+    Gives the same results as `Extract` and `XPathExtract`.
+    """
+
+    # Elements of which only the first one is read, like `soup.find`.
+    FIRST = frozenset({"hdorth", "pos", "etym", "sense"})
+    # Items, and the first element they have to be within, if any.
+    ITEMS = {
+        "hdorth": "hdorth",
+        "orth": None,
+        "ps": "pos",
+        "lang": "etym",
+        "def": "sense",
+        "cit": None,
+    }
+    # Descendants read from items, first one only.
+    FIELDS = {
+        "hdorth": frozenset({"reg", "orig"}),
+        "orth": frozenset({"reg"}),
+        "lang": frozenset({"lg"}),
+        "cit": frozenset(
+            {"date", "author", "title", "ms", "scope", "q", "stncl"}
+        ),
+    }
+    # Elements whose attributes are needed.
+    ATTRIBUTES = frozenset({"ps", "lg", "stncl"})
+    # Elements whose string value is needed.
+    TEXT = frozenset(
+        {"ps", "def", "reg", "orig", "lg"}
+        | {"date", "author", "title", "ms", "scope", "q"}
+    )
+
+    def __init__(self) -> None:
+        self.source_id: str | None = None
+        self.seen: set[str] = set()
+        self.inside: set[str] = set()
+        self.items: dict[str, list[Any]] = {k: [] for k in self.ITEMS}
+        self.scopes: list[_Node] = []
+        self.texts: list[list[str]] = []
+        self.frames: list[list[_Node | str]] = []
+
+    def start(self, tag: str, attrib: dict[str, str]) -> None:
+        frame: list[_Node | str] = []
+        for item in self.scopes:
+            if tag in self.FIELDS[item.tag] and tag not in item.fields:
+                item.fields[tag] = self._open(tag, attrib, frame)
+        if tag == "entryfree" and self.source_id is None:
+            self.source_id = attrib.get("id")
+        if tag in self.FIRST and tag not in self.seen:
+            self.seen.add(tag)
+            self.inside.add(tag)
+            frame.append(tag)
+        if tag in self.ITEMS:
+            within = self.ITEMS[tag]
+            if within is None or within in self.inside:
+                item = self._open(tag, attrib, frame)
+                item.index = len(self.items[tag])
+                self.items[tag].append(item)
+        self.frames.append(frame)
+
+    def _open(
+        self, tag: str, attrib: dict[str, str], frame: list[_Node | str]
+    ) -> _Node:
+        node = _Node(tag, dict(attrib) if tag in self.ATTRIBUTES else {})
+        if tag in self.TEXT:
+            self.texts.append(node.parts)
+        if tag in self.FIELDS:
+            self.scopes.append(node)
+        frame.append(node)
+        return node
+
+    def end(self, tag: str) -> None:
+        for opened in reversed(self.frames.pop()):
+            if isinstance(opened, str):
+                self.inside.discard(opened)
+                continue
+            if opened.tag in self.TEXT:
+                self.texts.pop()
+            if opened.tag in self.FIELDS:
+                self.scopes.pop()
+            if opened.index >= 0:
+                # Built in place to keep the order of the start tags.
+                self.items[opened.tag][opened.index] = self._build(opened)
+
+    def _build(self, item: _Node) -> Any:
+        match item.tag:
+            case "ps":
+                return self._pos(item)
+            case "lang":
+                return self._etymology(item)
+            case "def":
+                return Sense(text=_string(item).strip())
+            case "cit":
+                return self._citation(item)
+        # Forms wait for the headword, which may come after them.
+        return item
+
+    def data(self, text: str) -> None:
+        for parts in self.texts:
+            parts.append(text)
+
+    def close(self) -> dict[str, Any]:
+        if self.source_id is None:
+            raise ParsingException("no <entryfree> with an id in entry")
+        if not self.items["hdorth"]:
+            raise ParsingException("no <hdorth> in entry")
+        headword = Form(
+            headword=True,
+            regular=self._reg(self.items["hdorth"][0]),
+            original=_string(
+                self.items["hdorth"][0].fields.get("orig")
+            ).strip(),
+        )
+        result = {
+            "source_id": self.source_id,
+            "headword": headword,
+            "pos": self.items["ps"],
+            "etymologies": self.items["lang"],
+            "forms": [Form(True, headword.regular, headword.original)]
+            + [
+                # Like Extract, forms take the headword's original.
+                Form(False, self._reg(orth), headword.original)
+                for orth in self.items["orth"]
+            ],
+            "senses": self.items["def"],
+            "citations": self.items["cit"],
+        }
+        return result
+
+    @staticmethod
+    def _reg(form: _Node) -> str:
+        if "reg" not in form.fields:
+            raise ParsingException(f"no <reg> in <{form.tag}>")
+        return _string(form.fields["reg"]).strip()
+
+    @staticmethod
+    def _pos(ps: _Node) -> Pos:
+        if "expan" not in ps.attrib:
+            raise ParsingException("no expan attribute in <ps>")
+        return Pos(
+            code=ps.attrib["expan"].lower().strip(),
+            code_abbrev=_string(ps).lower().strip(),
+        )
+
+    @staticmethod
+    def _etymology(lang: _Node) -> Etymology:
+        lg = lang.fields.get("lg")
+        return Etymology(
+            code=lg.attrib.get("expan", "").lower().strip() if lg else "",
+            code_abbrev=_string(lg).lower().strip(),
+        )
+
+    @staticmethod
+    def _citation(cit: _Node) -> Citation:
+        get = cit.fields.get
+        stncl = get("stncl")
+        return Citation(
+            date=_string(get("date")).strip(),
+            author=_string(get("author")).strip(),
+            title=_string(get("title")).strip(),
+            ms=_string(get("ms")).strip(),
+            scope=_string(get("scope")).strip(),
+            text=_remove_mulitple_whitespace(
+                _string(get("q")).strip().replace("|", "")
+            ),
+            reference=stncl.attrib.get("rid", "") if stncl else "",
+        )
+
+
+def event_extract(content: Text) -> dict[str, Any]:
+    """Extract an entry with `EventExtract`, without building a tree."""
+    parser = etree.HTMLParser(target=EventExtract(), encoding="utf-8")
+    return etree.fromstring(content.encode("utf-8"), parser)
+
+
 def _remove_mulitple_whitespace(text: str) -> str:
     """Remove multiple whitespace characters from text."""
     return " ".join(text.split())
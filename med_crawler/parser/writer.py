@@ -0,0 +1,109 @@
+"""Incremental writers of parsed MED dictionary entries."""
+
+# Standard library imports
+from __future__ import annotations
+import json
+from typing import Any, Protocol, TextIO
+
+# Local library imports
+from med_crawler.parser.db import Rows, SqliteMedDB, entry_rows
+from med_crawler.parser.parser import Entry
+
+
+__all__ = [
+    "EntryWriter",
+    "JsonEntryWriter",
+    "SqliteEntryWriter",
+    "entry_json",
+]
+
+
+class EntryWriter(Protocol):
+    """Writer of entries, which may be serialized by parser workers.
+
+    `dump` serializes an entry for the writer and `write_dump` writes what
+    it made. Writers set `dump` to a module-level function so that it can
+    be sent to run in another process.
+    """
+
+    def dump(self, entry: Entry) -> Any:
+        raise NotImplementedError
+
+    def write(self, entry: Entry) -> None:
+        raise NotImplementedError
+
+    def write_dump(self, dumped: Any) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+
+def entry_json(entry: Entry) -> str:
+    return json.dumps(entry.as_dict())
+
+
+class JsonEntryWriter:
+    """A JSON array of entries written one element at a time."""
+
+    dump = staticmethod(entry_json)
+
+    def __init__(self, out: TextIO) -> None:
+        self.out = out
+        self.count = 0
+        self.out.write("[")
+
+    def write(self, entry: Entry) -> None:
+        self.write_dump(entry_json(entry))
+
+    def write_dump(self, dumped: str) -> None:
+        if self.count:
+            self.out.write(", ")
+        self.out.write(dumped)
+        self.count += 1
+
+    def flush(self) -> None:
+        self.out.flush()
+
+    def close(self) -> None:
+        self.out.write("]")
+        self.out.flush()
+
+
+class SqliteEntryWriter:
+    """Entries inserted into SQLite tables in batches of `batch_size`.
+
+    Entries the database rejects are skipped; their IDs are kept in
+    `skipped`.
+    """
+
+    dump = staticmethod(entry_rows)
+
+    def __init__(self, file_name: str, batch_size: int = 512) -> None:
+        self.db = SqliteMedDB(file_name=file_name).__enter__()
+        self.db.create_tables()
+        self.batch_size = batch_size
+        self.batch: list[Rows] = []
+        self.skipped: list[str] = []
+
+    def write(self, entry: Entry) -> None:
+        self.write_dump(entry_rows(entry))
+
+    def write_dump(self, dumped: Rows) -> None:
+        self.batch.append(dumped)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        batch, self.batch = self.batch, []
+        if batch:
+            self.skipped.extend(self.db.insert_rows(batch))
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self.db.__exit__(None, None, None)
@@ -0,0 +1,111 @@
+"""Crawl-to-parse pipeline parsing MED pages while they download."""
+
+# Standard library imports
+from __future__ import annotations
+import asyncio
+from collections import deque
+import concurrent.futures
+import contextlib
+import multiprocessing
+from typing import TYPE_CHECKING, Any, Callable
+
+# Local library imports
+if TYPE_CHECKING:
+    from med_crawler.log import Logger
+    from med_crawler.parser.writer import EntryWriter
+from med_crawler.crawler.transport import WebContents
+from med_crawler.log import Level
+from med_crawler.parser.parser import Entry, ParsingStrategy, parse_single
+
+
+__all__ = ["ParsingSink"]
+
+
+class ParsingSink:
+    """Crawler sink handing pages to a process pool of parsers.
+
+    Parsed entries go to `writer` in the order pages finished downloading,
+    already serialized by the parsers with the writer's `dump`.
+    At most `max_pending` pages wait in the pool; beyond that `drain`
+    suspends the crawler until the parsers catch up. IDs of pages that fail
+    to parse go to `on_failure`, such as `Crawler.fail`, with the reason.
+    Flushing never waits for the parsers.
+    """
+
+    def __init__(
+        self,
+        writer: EntryWriter,
+        strategy: ParsingStrategy = ParsingStrategy.lxml,
+        processes: int | None = None,
+        max_pending: int | None = None,
+        logger: Logger | None = None,
+        on_failure: Callable[[int, str], None] | None = None,
+    ) -> None:
+        if processes is None:
+            n_cpus = multiprocessing.cpu_count()
+            processes = n_cpus - 1 if n_cpus > 1 else 1
+        self.writer = writer
+        self.strategy = strategy
+        self.max_pending = max_pending or 2 * processes
+        self.logger = logger
+        self.on_failure = on_failure
+        self.executor = concurrent.futures.ProcessPoolExecutor(processes)
+        self.pending: deque[
+            tuple[int, concurrent.futures.Future[Any]]
+        ] = deque()
+
+    def put(self, id: int, contents: WebContents) -> None:
+        self._harvest()
+        future = self.executor.submit(
+            dump_single, contents.text, self.strategy, self.writer.dump
+        )
+        self.pending.append((id, future))
+
+    async def drain(self) -> None:
+        while len(self.pending) >= self.max_pending:
+            _, oldest = self.pending[0]
+            # `_harvest` deals with parse failures.
+            with contextlib.suppress(Exception):
+                await asyncio.wrap_future(oldest)
+            self._harvest()
+
+    def unwritten(self) -> set[int]:
+        """IDs of pages put but not parsed and written yet."""
+        return {id for id, _ in self.pending}
+
+    def flush(self) -> None:
+        # Called from the event loop, so only take what is already parsed;
+        # a checkpoint holds back the `unwritten` rest.
+        self._harvest()
+        self.writer.flush()
+
+    def close(self) -> None:
+        concurrent.futures.wait([future for _, future in self.pending])
+        self.flush()
+        self.executor.shutdown()
+        self.writer.close()
+
+    def _harvest(self) -> None:
+        while self.pending and self.pending[0][1].done():
+            id, future = self.pending.popleft()
+            try:
+                dumped = future.result()
+            except Exception as err:
+                if self.logger is not None:
+                    self.logger.log(
+                        f"failed to parse MED{id}. raised: {err!r}",
+                        Level.ERROR,
+                        event="parse_failed",
+                        id=id,
+                        error=repr(err),
+                    )
+                if self.on_failure is not None:
+                    self.on_failure(id, f"parse error {err!r}")
+                continue
+            self.writer.write_dump(dumped)
+
+
+def dump_single(
+    content: str, strategy: ParsingStrategy, dump: Callable[[Entry], Any]
+) -> Any:
+    return dump(parse_single(content, strategy))
@@ -0,0 +1,55 @@
+"""Files of a store of MED entry pages, one file per entry.
+
+Shared by the crawler, which writes stores, and the parser, which reads
+them, without the one depending on the other.
+"""
+
+# Standard library imports
+from __future__ import annotations
+import gzip
+import hashlib
+import os
+from pathlib import Path
+from typing import Iterator
+
+
+__all__ = ["content_hash", "iter_store", "read_entry", "store_id"]
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def store_id(path: Path) -> int | None:
+    """Return the MED ID of an entry file or None for anything else."""
+    name = path.name
+    if not name.startswith("MED"):
+        return None
+    head, _, _ = name.partition(".")
+    try:
+        return int(head[3:])
+    except ValueError:
+        return None
+
+
+def iter_store(root: str | Path) -> Iterator[Path]:
+    """Yield entry files below root, whether flat or bucketed.
+
+    Directories are listed one at a time in name order, so only a single
+    bucket is held in memory rather than the whole store.
+    """
+    with os.scandir(root) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+    for entry in entries:
+        if entry.is_dir():
+            yield from iter_store(entry.path)
+        elif entry.is_file() and not entry.name.startswith("."):
+            yield Path(entry.path)
+
+
+def read_entry(path: Path) -> str:
+    if path.suffix == ".gz":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+    with open(path, "r") as f:
+        return f.read()
@@ -0,0 +1,188 @@
+"""Crawler throughput benchmark against the local mock MED server.
+
+Run with `python -m tests.bench`, optionally giving the concurrency
+settings to compare, e.g. `python -m tests.bench -c 1 5 20 --latency 0.05`.
+"""
+
+# Standard library imports
+from __future__ import annotations
+import argparse
+from dataclasses import dataclass
+import io
+import statistics
+import time
+import tracemalloc
+from typing import Mapping
+
+# Local library imports
+from med_crawler.crawler.crawler import Crawler
+from med_crawler.crawler.retry import RetryPolicy
+from med_crawler.crawler.transport import (
+    Transport,
+    TransportKind,
+    WebContents,
+    make_transport,
+)
+from med_crawler.log import CrawlerLogger
+
+from .server import MockMedServer, ServerConfig
+
+
+class TimedTransport:
+    """Transport recording the latency of every request it makes."""
+
+    def __init__(self, transport: Transport) -> None:
+        self.transport = transport
+        self.latencies: list[float] = []
+
+    async def get(
+        self, url: str, headers: Mapping[str, str] | None = None
+    ) -> WebContents:
+        start = time.perf_counter()
+        try:
+            return await self.transport.get(url, headers)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    async def close(self) -> None:
+        await self.transport.close()
+
+
+@dataclass(slots=True, frozen=True)
+class BenchResult:
+    concurrency: int
+    pages: int
+    requests: int
+    elapsed: float
+    p50: float
+    p95: float
+    p99: float
+    peak_memory: int
+    settled: int
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.pages / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.concurrency:>5} {self.pages:>7} {self.requests:>8} "
+            f"{self.pages_per_sec:>9.1f} {self.p50 * 1e3:>8.1f} "
+            f"{self.p95 * 1e3:>8.1f} {self.p99 * 1e3:>8.1f} "
+            f"{self.peak_memory / 2**20:>8.1f} {self.settled:>7}"
+        )
+
+
+HEADER = (
+    f"{'conc':>5} {'pages':>7} {'requests':>8} {'pages/s':>9} "
+    f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak MiB':>8} "
+    f"{'settled':>7}"
+)
+
+
+def percentile(values: list[float], p: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[p - 1]
+
+
+def run(
+    server: MockMedServer,
+    concurrency: int,
+    kind: TransportKind = TransportKind.AUTO,
+    attempts: int = 4,
+) -> BenchResult:
+    """Crawl every ID up to the server's last one and time it."""
+    out = io.StringIO()
+    transport = TimedTransport(make_transport(kind, 4 * concurrency))
+    c = Crawler(
+        out,
+        CrawlerLogger(io.StringIO(), False),
+        server.config.last_id,
+        concurrent_requests=concurrency,
+        transport=transport,
+        retry=RetryPolicy(attempts=attempts, base=0.05, cap=1.0),
+        url=server.url,
+    )
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        c.crawl()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    latencies = transport.latencies
+    return BenchResult(
+        concurrency=concurrency,
+        pages=out.getvalue().count("<!DOCTYPE"),
+        requests=len(latencies),
+        elapsed=elapsed,
+        p50=percentile(latencies, 50),
+        p95=percentile(latencies, 95),
+        p99=percentile(latencies, 99),
+        peak_memory=peak,
+        settled=c.limiter.limit,
+    )
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="bench", description="Benchmark the MED crawler offline"
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 5, 20],
+        help="concurrent_requests settings to compare",
+    )
+    parser.add_argument("-n", "--pages", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--gap-every",
+        type=int,
+        default=0,
+        help="serve 404 for every nth ID",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="requests per second before the server answers 429",
+    )
+    parser.add_argument(
+        "--transport",
+        type=TransportKind,
+        choices=list(TransportKind),
+        default=TransportKind.AUTO,
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = get_args()
+    gaps = frozenset(
+        range(args.gap_every, args.pages + 1, args.gap_every)
+        if args.gap_every
+        else ()
+    )
+    print(HEADER)
+    for concurrency in args.concurrency:
+        config = ServerConfig(
+            last_id=args.pages,
+            gaps=gaps,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            rate_limit=args.rate_limit,
+        )
+        with MockMedServer(config) as server:
+            print(run(server, concurrency, args.transport), flush=True)
+
+
+if __name__ == "__main__":
+    main()
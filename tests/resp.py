@@ -1,7 +1,7 @@
 """Mock response elements."""
 
 # Standard library imports
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from io import StringIO
 
 
@@ -421,12 +421,50 @@ resp_text = """
 """
 
 
+# This is a sample MED dictionary entry in the XML form the parser reads.
+entry_text = """<?xml version="1.0" encoding="UTF-8"?>
+<entryfree id="MED1">
+  <form>
+    <hdorth><reg>ā</reg><orig>a</orig></hdorth>
+    <orth><reg>ā</reg></orth>
+    <orth><reg>aa</reg></orth>
+    <pos><ps expan="noun">n.(1)</ps></pos>
+  </form>
+  <etym><lang><lg expan="Old English">OE</lg></lang></etym>
+  <sense n="1">
+    <def>The first letter of the alphabet.</def>
+    <eg>
+      <cit>
+        <bibl>
+          <stncl rid="HYP.733.19981211T105002">
+            <date>c1175</date><title>Orm.</title>
+          </stncl>
+          <ms>(Jun 1)</ms><scope>16434</scope>
+        </bibl>
+        <q>Þe firrste staff iss nemmnedd |A|  Onn ure Latin spæche.</q>
+      </cit>
+      <cit>
+        <bibl>
+          <stncl rid="HYP.1.2">
+            <date>a1400</date><author>Chaucer</author><title>Astr.</title>
+          </stncl>
+          <ms>(Dc 1)</ms><scope>1.7</scope>
+        </bibl>
+        <q>The lettre A.</q>
+      </cit>
+    </eg>
+  </sense>
+</entryfree>
+"""
+
+
 resp_string_io = StringIO(resp_text)
 
 
 @dataclass
 class MockResp:
     text: str = resp_text
+    headers: dict[str, str] = field(default_factory=dict)
 
     def raise_for_status(self) -> None:
         return None
@@ -0,0 +1,147 @@
+"""Local stand-in for the MED web server."""
+
+# Standard library imports
+from __future__ import annotations
+from dataclasses import dataclass, field
+import http.server
+import random
+import re
+import threading
+import time
+from typing import Any
+
+# Local library imports
+from .resp import resp_text
+
+
+@dataclass
+class ServerConfig:
+    """Behaviour of the mock server.
+
+    Every request waits `latency` seconds give or take `jitter`, returns
+    404 past `last_id` or for IDs in `gaps`, and otherwise fails with 503
+    at `error_rate`. With `rate_limit` set, requests over `rate_limit` per
+    second (after a burst of `burst`) get 429 with a Retry-After header.
+    """
+
+    last_id: int = 1_000
+    gaps: frozenset[int] = frozenset()
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    rate_limit: float | None = None
+    burst: int = 10
+    retry_after: int = 1
+    seed: int = 0
+
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    status_codes: dict[int, int] = field(default_factory=dict)
+    in_flight: int = 0
+    peak_in_flight: int = 0
+
+
+class MockMedServer:
+    """Threaded HTTP/1.1 server with keep-alive serving MED-like pages."""
+
+    path_re = re.compile(r"/MED(\d+)$")
+
+    def __init__(self, config: ServerConfig | None = None) -> None:
+        self.config = config or ServerConfig()
+        self.stats = ServerStats()
+        self.lock = threading.Lock()
+        self.random = random.Random(self.config.seed)
+        self.tokens = float(self.config.burst)
+        self.refilled = time.monotonic()
+        self.httpd = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), self.handler()
+        )
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True
+        )
+
+    def __enter__(self) -> MockMedServer:
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host!s}:{port}/"
+
+    def respond(self, path: str) -> tuple[int, dict[str, str], str]:
+        with self.lock:
+            self.stats.requests += 1
+            limited = not self._take_token()
+            failed = self.random.random() < self.config.error_rate
+            delay = self.config.latency + self.random.uniform(
+                -self.config.jitter, self.config.jitter
+            )
+        if limited:
+            headers = {"Retry-After": str(self.config.retry_after)}
+            return 429, headers, ""
+        time.sleep(max(0.0, delay))
+        match = self.path_re.search(path)
+        if match is None:
+            return 404, {}, ""
+        id = int(match.group(1))
+        if id > self.config.last_id or id in self.config.gaps:
+            return 404, {}, ""
+        if failed:
+            return 503, {}, ""
+        return 200, {}, resp_text.replace("doc_med1", f"doc_med{id}")
+
+    def _take_token(self) -> bool:
+        if self.config.rate_limit is None:
+            return True
+        now = time.monotonic()
+        self.tokens = min(
+            float(self.config.burst),
+            self.tokens + (now - self.refilled) * self.config.rate_limit,
+        )
+        self.refilled = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def handler(self) -> type[http.server.BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                with server.lock:
+                    server.stats.in_flight += 1
+                    server.stats.peak_in_flight = max(
+                        server.stats.peak_in_flight, server.stats.in_flight
+                    )
+                try:
+                    status, headers, text = server.respond(self.path)
+                finally:
+                    with server.lock:
+                        server.stats.in_flight -= 1
+                        codes = server.stats.status_codes
+                        codes[status] = codes.get(status, 0) + 1
+                body = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                return None
+
+        return Handler
@@ -0,0 +1,99 @@
+"""Tests of the compressed crawl archive."""
+
+# Standard library imports
+import gzip
+from io import StringIO
+from pathlib import Path
+from typing import Literal
+
+# Third-party library imports
+import pytest
+
+# Local library imports
+from med_crawler import crawler
+from med_crawler import log
+from med_crawler.crawler.archive import (
+    ArchiveException,
+    ArchiveSink,
+    iter_archive,
+    trim_archive,
+)
+from med_crawler.crawler.transport import WebContents
+from .resp import resp_text
+
+
+class PageTransport:
+    async def get(self, url: str, headers=None) -> WebContents:
+        id = url.rsplit("MED", 1)[1]
+        return WebContents(resp_text.replace("doc_med1", f"doc_med{id}"), 200)
+
+    async def close(self) -> None:
+        return None
+
+
+def test_archive_roundtrip(tmp_path: Path) -> None:
+    path = tmp_path / "med.warc.gz"
+    c = crawler.Crawler(
+        ArchiveSink(open(path, "wb")),
+        log.CrawlerLogger(StringIO(), False),
+        20,
+        transport=PageTransport(),
+    )
+    c.crawl()
+    records = list(iter_archive(path, chunk_size=1024))
+    assert sorted(r.id for r in records) == list(range(1, 21))
+    assert all(r.status_code == 200 for r in records)
+    assert all(f"doc_med{r.id}" in r.text for r in records)
+    assert all(r.digest.startswith("sha256:") for r in records)
+    assert path.stat().st_size < len(resp_text) * 20 / 2
+    with open(path, "rb") as f:
+        f.seek(records[3].offset)
+        head = gzip.GzipFile(fileobj=f).read(200).decode()
+    assert f"MED-ID: {records[3].id}" in head
+
+
+def test_archive_appends(tmp_path: Path) -> None:
+    path = tmp_path / "med.warc.gz"
+    modes: tuple[Literal["wb", "ab"], ...] = ("wb", "ab")
+    for id, mode in enumerate(modes, 1):
+        sink = ArchiveSink(open(path, mode))
+        sink.put(id, WebContents(f"page {id}", 200))
+        sink.close()
+    assert [(r.id, r.text) for r in iter_archive(path)] == [
+        (1, "page 1"),
+        (2, "page 2"),
+    ]
+
+
+def test_archive_latest(tmp_path: Path) -> None:
+    path = tmp_path / "med.warc.gz"
+    sink = ArchiveSink(open(path, "wb"))
+    for id, text in ((1, "old"), (2, "two"), (1, "new")):
+        sink.put(id, WebContents(text, 200))
+    sink.close()
+    assert [r.text for r in iter_archive(path)] == ["old", "two", "new"]
+    assert [r.text for r in iter_archive(path, latest=True)] == [
+        "two",
+        "new",
+    ]
+
+
+def test_archive_trimmed_before_append(tmp_path: Path) -> None:
+    path = tmp_path / "med.warc.gz"
+    sink = ArchiveSink(open(path, "wb"))
+    for id in (1, 2, 3):
+        sink.put(id, WebContents(f"page {id}", 200))
+    sink.close()
+    third = list(iter_archive(path))[2].offset
+    with open(path, "r+b") as f:
+        f.truncate(path.stat().st_size - 5)
+    broken = tmp_path / "broken.warc.gz"
+    broken.write_bytes(path.read_bytes() + path.read_bytes()[:third])
+    with pytest.raises(ArchiveException):
+        list(iter_archive(broken))
+    assert trim_archive(path) == third
+    sink = ArchiveSink(open(path, "ab"))
+    sink.put(4, WebContents("page 4", 200))
+    sink.close()
+    assert [r.id for r in iter_archive(path)] == [1, 2, 4]
+    assert trim_archive(tmp_path / "missing") == 0
@@ -0,0 +1,71 @@
+"""Tests of the resumable crawl checkpoint."""
+
+# Standard library imports
+from io import StringIO
+from pathlib import Path
+
+# Local library imports
+from med_crawler import crawler
+from med_crawler import log
+from med_crawler.crawler.checkpoint import Checkpoint, EntryStatus
+from .resp import MockResp
+
+
+def test_checkpoint_pending(tmp_path: Path) -> None:
+    file_name = str(tmp_path / "crawl.checkpoint")
+    with Checkpoint(file_name, flush_interval=60) as c:
+        c.record(1, 200)
+        c.record(2, 404)
+        c.record(3, 500)
+        c.record(4, None)
+    with Checkpoint(file_name) as c:
+        assert c.ids(EntryStatus.FAILED) == {3, 4}
+        assert list(c.pending(range(1, 7))) == [3, 4, 5, 6]
+        c.clear()
+        assert list(c.pending(range(1, 3))) == [1, 2]
+
+
+def test_checkpoint_flushes_followed_files(tmp_path: Path) -> None:
+    out = StringIO()
+    flushed = []
+    out.flush = lambda: flushed.append(True)  # type: ignore
+    with Checkpoint(str(tmp_path / "c"), follows=[out]) as c:
+        c.record(1, 200)
+        c.flush()
+    assert flushed
+
+
+class Unwritten(StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.ids = {1}
+
+    def unwritten(self) -> set[int]:
+        return self.ids
+
+
+def test_checkpoint_holds_back_unwritten(tmp_path: Path) -> None:
+    out = Unwritten()
+    with Checkpoint(str(tmp_path / "c"), follows=[out]) as c:
+        c.record(1, 200)
+        c.record(2, 200)
+        c.flush()
+        assert c.ids(EntryStatus.OK) == {2}
+        c.record(1, None)
+        out.ids = set()
+        c.flush()
+        assert c.ids(EntryStatus.FAILED) == {1}
+
+
+def test_crawler_resumes_from_checkpoint(mocker, tmp_path: Path) -> None:
+    get = mocker.patch("requests.get", return_value=MockResp())
+    file_name = str(tmp_path / "crawl.checkpoint")
+    with Checkpoint(file_name) as c:
+        c.record(1, 200)
+        c.record(3, 404)
+        out = StringIO()
+        crawler.Crawler(
+            out, log.CrawlerLogger(StringIO(), False), 5, checkpoint=c
+        ).crawl()
+        assert get.call_count == 3
+        assert c.ids(EntryStatus.OK) == {1, 2, 4, 5}
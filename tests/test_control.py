@@ -0,0 +1,76 @@
+"""Tests of the adaptive crawler concurrency controller."""
+
+# Standard library imports
+import asyncio
+
+# Local library imports
+from med_crawler.crawler.control import AdaptiveLimiter
+
+
+def test_limiter_additive_increase() -> None:
+    l = AdaptiveLimiter(initial=2, maximum=4)
+    for _ in range(2 + 3):
+        l.record(0.01, 200)
+    assert l.limit == 4
+    for _ in range(10):
+        l.record(0.01, 200)
+    assert l.limit == 4
+
+
+def test_limiter_multiplicative_decrease_once_per_window() -> None:
+    l = AdaptiveLimiter(initial=8, maximum=8)
+    l.record(0.01, 503)
+    assert l.limit == 4
+    for _ in range(3):
+        l.record(0.01, 429)
+    assert l.limit == 4
+    l.record(0.01, None)
+    assert l.limit == 2
+
+
+def test_limiter_backs_off_on_latency() -> None:
+    l = AdaptiveLimiter(initial=4, maximum=8, latency_window=4)
+    for _ in range(4):
+        l.record(0.1, 200)
+    assert l.limit == 5
+    for _ in range(5):
+        l.record(1.0, 200)
+    assert l.limit == 2
+
+
+def test_limiter_recovers_after_latency_spike() -> None:
+    l = AdaptiveLimiter(initial=8, maximum=10)
+    for _ in range(8):
+        l.record(0.1, 200)
+    assert l.limit == 9
+    for _ in range(10):
+        l.record(1.0, 200)
+    assert l.limit == 4
+    for _ in range(60):
+        l.record(0.1, 200)
+    assert l.limit == 10
+
+
+def test_limiter_404_is_healthy() -> None:
+    l = AdaptiveLimiter(initial=1, maximum=2)
+    l.record(0.01, 404)
+    assert l.limit == 2
+
+
+def test_limiter_bounds_in_flight() -> None:
+    l = AdaptiveLimiter(initial=2, maximum=2)
+    peak = 0
+
+    async def work() -> None:
+        nonlocal peak
+        await l.acquire()
+        peak = max(peak, l.in_flight)
+        await asyncio.sleep(0)
+        await l.release(0.01, 200)
+
+    async def run() -> None:
+        await asyncio.gather(*[work() for _ in range(10)])
+
+    asyncio.run(run())
+    assert peak == 2
+    assert l.in_flight == 0
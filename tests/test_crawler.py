@@ -1,6 +1,7 @@
 """Tests of the Middle English Dictionary crawler."""
 
 # Standard library imports
+import asyncio
 from io import StringIO
 from contextlib import nullcontext as does_not_raise
 
@@ -9,6 +10,7 @@ import pytest
 
 # Local library imports
 from med_crawler import crawler
+from med_crawler.crawler import transport
 from med_crawler import log
 from .resp import MockResp, resp_text
 
@@ -34,3 +36,89 @@ def test_crawler_public_sync_crawl(mocker, mock_io) -> None:
     c = crawler.Crawler(mock_io, log.CrawlerLogger(mock_io, False), 3)
     with does_not_raise():
         c.crawl(False)
+
+
+@pytest.mark.parametrize(
+    "kind, want",
+    [
+        ("thread", transport.ThreadTransport),
+        ("aiohttp", transport.AiohttpTransport),
+        ("auto", transport.AiohttpTransport),
+    ],
+)
+def test_make_transport(kind: str, want: type) -> None:
+    pytest.importorskip("aiohttp")
+    assert isinstance(transport.make_transport(kind), want)
+
+
+def test_aiohttp_transport_get() -> None:
+    web = pytest.importorskip("aiohttp.web")
+    peers: set[int] = set()
+
+    async def handler(request):
+        peers.add(request.transport.get_extra_info("peername")[1])
+        if request.match_info["id"] == "404":
+            raise web.HTTPNotFound()
+        return web.Response(text=resp_text, content_type="text/html")
+
+    async def run() -> list[transport.WebContents]:
+        app = web.Application()
+        app.router.add_get("/MED{id}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        t = transport.AiohttpTransport(pool_size=1)
+        try:
+            return [
+                await t.get(f"http://127.0.0.1:{port}/MED{id}")
+                for id in (1, 2, 404)
+            ]
+        finally:
+            await t.close()
+            await runner.cleanup()
+
+    have = asyncio.run(run())
+    assert [r.status_code for r in have] == [200, 200, 404]
+    assert have[0].text == resp_text
+    assert have[2].text == ""
+    assert len(peers) == 1
+
+
+class CountingTransport:
+    def __init__(self, crawler: crawler.Crawler | None = None) -> None:
+        self.crawler = crawler
+        self.urls: list[str] = []
+
+    async def get(self, url: str, headers=None) -> transport.WebContents:
+        self.urls.append(url)
+        await asyncio.sleep(0)
+        if self.crawler is not None and len(self.urls) == 10:
+            self.crawler.stop()
+        return transport.WebContents(resp_text, 200)
+
+    async def close(self) -> None:
+        return None
+
+
+def test_crawler_schedule_is_lazy(mock_io) -> None:
+    c = crawler.Crawler(mock_io, log.CrawlerLogger(mock_io, False), 10**9)
+    ids = c.schedule()
+    assert not isinstance(ids, list)
+    assert next(iter(ids)) == 1
+
+
+def test_crawler_stop_drains(mock_io) -> None:
+    c = crawler.Crawler(
+        mock_io,
+        log.CrawlerLogger(StringIO(), False),
+        10**9,
+        concurrent_requests=2,
+        max_concurrent_requests=4,
+    )
+    t = CountingTransport(c)
+    c.transport = t
+    c.crawl()
+    assert 10 <= len(t.urls) <= 10 + 4
+    assert mock_io.getvalue().count(resp_text) == len(t.urls)
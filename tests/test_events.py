@@ -0,0 +1,74 @@
+"""Differential tests of the single-pass event extractor."""
+
+# Third-party library imports
+import pytest
+
+# Local library imports
+from med_crawler.parser.parser import (
+    EventExtract,
+    Parser,
+    ParsingException,
+    ParsingStrategy,
+    parse_single,
+)
+from .resp import entry_text, resp_text
+from .test_xpath import corpus, extra_cits, without_ids
+
+
+events_corpus = {
+    **corpus,
+    "nested citations": entry_text.replace(
+        "<q>The lettre A.</q>", f"<q>The lettre A.</q>{extra_cits[:200]}"
+    ),
+    "second headword": entry_text.replace(
+        "</form>", "<hdorth><reg>b</reg><orig>c</orig></hdorth></form>"
+    ),
+    "several pos": entry_text.replace(
+        "</form>", '</form><pos><ps expan="verb">v.</ps></pos>'
+    ),
+    "nested defs": entry_text.replace(
+        "<def>", "<def>Outer <def>inner</def> text "
+    ),
+}
+
+
+@pytest.mark.parametrize("name", list(events_corpus))
+def test_events_match_soup(name: str) -> None:
+    text = events_corpus[name]
+    want = parse_single(text, ParsingStrategy.LXML).as_dict()
+    got = parse_single(text, ParsingStrategy.EVENTS).as_dict()
+    assert without_ids(got) == without_ids(want)
+
+
+def test_events_keep_only_open_elements() -> None:
+    target = EventExtract()
+    target.start("entryfree", {"id": "MED1"})
+    target.start("cit", {})
+    target.start("q", {})
+    target.data("text")
+    assert len(target.texts) == 1 and len(target.scopes) == 1
+    target.end("q")
+    target.end("cit")
+    target.end("entryfree")
+    assert not target.texts and not target.scopes and not target.frames
+    assert target.items["cit"][0].text == "text"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        resp_text,
+        entry_text.replace('id="MED1"', ""),
+        entry_text.replace("<reg>ā</reg><orig>", "<orig>"),
+        entry_text.replace(' expan="noun"', ""),
+    ],
+)
+def test_events_reject_invalid_entries(text: str) -> None:
+    with pytest.raises(ParsingException):
+        parse_single(text, ParsingStrategy.EVENTS)
+
+
+def test_events_in_pool() -> None:
+    with Parser(ParsingStrategy.EVENTS, processes=1) as p:
+        entries = p.parse([entry_text, corpus["page"]])
+    assert [e.source_id for e in entries] == ["MED1", "MED1"]
@@ -0,0 +1,104 @@
+"""Tests of crawl-time extraction of entry fragments."""
+
+# Standard library imports
+from io import StringIO
+
+# Third-party library imports
+from bs4 import BeautifulSoup
+import pytest
+
+# Local library imports
+from med_crawler import crawler
+from med_crawler import log
+from med_crawler.crawler.transport import WebContents
+from med_crawler.fragment import entry_fragment, is_well_formed
+from med_crawler.parser import parser
+from med_crawler.parser.parser import ParsingStrategy, parse_single
+from .resp import entry_text, resp_text
+
+
+entry = entry_text.split("\n", 1)[1].strip()
+page = resp_text.replace("</body>", f"{entry}\n</body>")
+
+
+class PageTransport:
+    async def get(self, url: str, headers=None) -> WebContents:
+        if url.endswith("MED2"):
+            return WebContents(page.replace("</entryfree>", ""), 200)
+        return WebContents(page, 200)
+
+    async def close(self) -> None:
+        return None
+
+
+def test_entry_fragment() -> None:
+    assert entry_fragment(page) == entry
+    assert entry_fragment(resp_text) is None
+    assert entry_fragment(page.replace("</entryfree>", "")) is None
+    assert entry_fragment("<ENTRYFREE id='x'>a</ENTRYFREE>") is not None
+
+
+def test_is_well_formed() -> None:
+    assert is_well_formed(entry)
+    assert is_well_formed("<entryfree>&nbsp;</entryfree>")
+    assert not is_well_formed("<entryfree><sense></entryfree>")
+
+
+def test_crawler_keeps_fragments() -> None:
+    out, logs = StringIO(), StringIO()
+    c = crawler.Crawler(
+        out,
+        log.CrawlerLogger(logs, False),
+        2,
+        transport=PageTransport(),
+        fragment=True,
+    )
+    c.crawl()
+    text = out.getvalue()
+    assert text.count("<!DOCTYPE") == 1
+    assert text.count("<entryfree") == 2
+    assert "kept whole page of MED2" in logs.getvalue()
+    assert len(entry) < len(page) / 5
+
+
+def without_ids(value):
+    if isinstance(value, dict):
+        return {k: without_ids(v) for k, v in value.items() if k != "id"}
+    if isinstance(value, list):
+        return [without_ids(v) for v in value]
+    return value
+
+
+def test_fragment_parses_like_page() -> None:
+    strategy = ParsingStrategy.lxml
+    expected = parse_single(page, strategy).as_dict()
+    result = parse_single(entry, strategy).as_dict()
+    assert without_ids(result) == without_ids(expected)
+
+
+def parse_whole(text: str, strategy: ParsingStrategy) -> parser.Entry:
+    match strategy:
+        case ParsingStrategy.XPATH:
+            result = parser.XPathExtract(parser.html_tree(text))()
+        case ParsingStrategy.EVENTS:
+            result = parser.event_extract(text)
+        case _:
+            result = parser.Extract(BeautifulSoup(text, strategy))()
+    return parser.Entry(**result)
+
+
+def test_entry_region() -> None:
+    assert parser.entry_region(page) == entry
+    cut_off = page.replace("</entryfree>", "")
+    assert parser.entry_region(cut_off) == cut_off
+
+
+@pytest.mark.parametrize("strategy", list(ParsingStrategy))
+def test_parse_single_slices_page(strategy: ParsingStrategy, mocker) -> None:
+    spy = mocker.spy(parser, "entry_region")
+    for text in (page, page.replace("</entryfree>", "")):
+        expected = parse_whole(text, strategy).as_dict()
+        result = parse_single(text, strategy).as_dict()
+        assert without_ids(result) == without_ids(expected)
+    assert spy.spy_return == page.replace("</entryfree>", "")
+    assert spy.call_count == 2
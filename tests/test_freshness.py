@@ -0,0 +1,49 @@
+"""Tests of the incremental recrawl state."""
+
+# Standard library imports
+from io import StringIO
+from pathlib import Path
+
+# Local library imports
+from med_crawler import crawler
+from med_crawler import log
+from med_crawler.crawler.freshness import Freshness
+from med_crawler.crawler.transport import WebContents
+from .resp import MockResp
+
+
+def test_freshness_validators(tmp_path: Path) -> None:
+    file_name = str(tmp_path / "state")
+    page = WebContents("a", 200, {"ETag": '"x"', "Last-Modified": "then"})
+    with Freshness(file_name) as f:
+        assert f.headers(1) == {}
+        assert f.update(1, page)
+        assert not f.update(1, WebContents("a", 200))
+        assert f.update(2, WebContents("b", 200))
+        assert not f.update(2, WebContents("", 304))
+    with Freshness(file_name) as f:
+        assert f.headers(1) == {}
+        f.update(1, page)
+        assert f.headers(1) == {
+            "If-None-Match": '"x"',
+            "If-Modified-Since": "then",
+        }
+        assert f.stalest([1, 3, 2]) == [3, 2, 1]
+
+
+def test_crawler_incremental(mocker, tmp_path: Path) -> None:
+    get = mocker.patch("requests.get", return_value=MockResp())
+    with Freshness(str(tmp_path / "state")) as f:
+        out = StringIO()
+        c = crawler.Crawler(
+            out, log.CrawlerLogger(StringIO(), False), 3, freshness=f
+        )
+        c.crawl()
+        first = out.getvalue()
+        c.crawl()
+        assert out.getvalue() == first
+        assert get.call_count == 6
+        c.request_budget = 2
+        c.crawl()
+        assert get.call_count == 8
+        assert f.stalest([1, 2, 3])[0] == 3
@@ -0,0 +1,121 @@
+"""Tests of MED ID space discovery and the gap map."""
+
+# Standard library imports
+import asyncio
+from io import StringIO
+from pathlib import Path
+
+# Third-party library imports
+import pytest
+
+# Local library imports
+from med_crawler import crawler
+from med_crawler import log
+from med_crawler.crawler.idspace import IdSpace, discover
+from med_crawler.crawler.transport import WebContents
+
+
+def existing(last: int, gaps: set[int]):
+    probes: list[int] = []
+
+    async def exists(id: int) -> bool:
+        probes.append(id)
+        return id <= last and id not in gaps
+
+    return exists, probes
+
+
+@pytest.mark.parametrize("start", [1, 100, 54_083, 60_000, 10**6])
+@pytest.mark.parametrize("last", [0, 1, 54_083, 75_000])
+def test_discover(start: int, last: int) -> None:
+    gaps = {i for i in range(2, last) if i % 7 == 0 or 500 < i < 510}
+    exists, probes = existing(last, gaps)
+    have = asyncio.run(discover(exists, start, window=16))
+    assert have == last
+    assert len(probes) < 16 * 2 * 20
+
+
+def test_idspace_gaps(tmp_path: Path) -> None:
+    file_name = str(tmp_path / "idspace")
+    with IdSpace(file_name) as s:
+        s.record(2, 404)
+        s.record(3, 404)
+        s.record(4, 200)
+        s.set_last_id(5)
+    with IdSpace(file_name) as s:
+        assert s.last_id == 5
+        assert list(s.without_gaps(range(1, 6))) == [1, 4, 5]
+        s.record(3, 200)
+    with IdSpace(file_name) as s:
+        assert s.gaps == {2}
+
+
+def test_idspace_forgets_gaps_past_the_end(tmp_path: Path) -> None:
+    file_name = str(tmp_path / "idspace")
+    with IdSpace(file_name) as s:
+        s.record(2, 404)
+        s.record(8, 404)
+        s.set_last_id(5)
+        s.record(9, 404)
+        assert s.gaps == {2}
+    with IdSpace(file_name) as s:
+        s.record(4, 404)
+        s.set_last_id(10)
+        assert list(s.without_gaps(range(1, 11))) == [1, 3, 5, 6, 7, 8, 9, 10]
+    with IdSpace(file_name) as s:
+        assert s.gaps == {2, 4}
+
+
+class GappyTransport:
+    def __init__(self, last: int, gaps: set[int]) -> None:
+        self.last, self.gaps = last, gaps
+        self.calls: list[int] = []
+
+    async def get(self, url: str, headers=None) -> WebContents:
+        id = int(url.rsplit("MED", 1)[1])
+        self.calls.append(id)
+        if id > self.last or id in self.gaps:
+            return WebContents("", 404)
+        return WebContents(f"MED{id}", 200)
+
+    async def close(self) -> None:
+        return None
+
+
+def test_crawler_discovers_and_skips_gaps(tmp_path: Path) -> None:
+    t = GappyTransport(300, {5, 6, 7})
+    with IdSpace(str(tmp_path / "idspace")) as s:
+        c = crawler.Crawler(
+            StringIO(),
+            log.CrawlerLogger(StringIO(), False),
+            200,
+            transport=t,
+            idspace=s,
+        )
+        assert c.discover() == 300
+        c.crawl()
+        assert s.gaps >= {5, 6, 7}
+        t.calls.clear()
+        c.crawl()
+        assert not {5, 6, 7} & set(t.calls)
+        assert len(t.calls) == 297
+
+
+def test_crawler_follows_growing_med(tmp_path: Path) -> None:
+    t = GappyTransport(100, set())
+    with IdSpace(str(tmp_path / "idspace")) as s:
+        c = crawler.Crawler(
+            StringIO(),
+            log.CrawlerLogger(StringIO(), False),
+            100,
+            transport=t,
+            idspace=s,
+        )
+        assert c.discover() == 100
+        c.crawl()
+        assert not s.gaps
+        t.last = 130
+        assert c.discover() == 130
+        t.calls.clear()
+        c.crawl()
+        assert set(range(101, 131)) <= set(t.calls)
@@ -5,6 +5,9 @@ from med_crawler import log
 import sys
 import contextlib
 from io import StringIO
+import time
+
+import pytest
 
 
 def test_crawler_logger() -> None:
@@ -19,3 +22,56 @@ def test_crawler_logger() -> None:
         "1::ERROR::this is an error!\n",
     ]
 
+
+
+class FlushCounter(StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.flushes = 0
+
+    def flush(self) -> None:
+        self.flushes += 1
+
+
+def test_queue_logger() -> None:
+    out = StringIO()
+    with log.QueueLogger(out, False) as l:
+        l.log("this is a warning", log.Level.WARN)
+        l.log("this is an error!", log.Level.ERROR)
+    assert out.getvalue().splitlines() == [
+        "0::WARNING::this is a warning",
+        "1::ERROR::this is an error!",
+    ]
+
+
+def test_queue_logger_batches_flushes() -> None:
+    out = FlushCounter()
+    l = log.QueueLogger(out, True, batch_size=100, flush_interval=60)
+    for n in range(1000):
+        l.log(f"crawled MED{n}", log.Level.OK)
+    l.close()
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 1000
+    assert lines[999].startswith("999::OK::")
+    assert lines[999].endswith("::crawled MED999")
+    assert out.flushes <= 11
+
+
+def test_queue_logger_flushes_on_time() -> None:
+    out = FlushCounter()
+    l = log.QueueLogger(out, False, flush_interval=0.01)
+    l.log("soon", log.Level.OK)
+    deadline = time.monotonic() + 5
+    while not out.flushes and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert out.flushes == 1
+    l.close()
+
+
+def test_queue_logger_reports_write_errors() -> None:
+    out = StringIO()
+    out.close()
+    l = log.QueueLogger(out, False)
+    l.log("lost", log.Level.OK)
+    with pytest.raises(log.LoggingError):
+        l.close()
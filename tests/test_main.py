@@ -5,8 +5,13 @@ import argparse
 from contextlib import nullcontext as does_not_raise
 from io import StringIO
 
+# Third-party library imports
+import pytest
+
 # Local library imports
 from med_crawler.crawler import __main__ as cmain
+from med_crawler.crawler.archive import ArchiveSink
+from med_crawler.crawler.transport import WebContents
 from med_crawler.parser import __main__ as pmain
 from .resp import MockResp, resp_string_io
 
@@ -19,6 +24,28 @@ def test_crawl_main(mocker) -> None:
         log=resp_string_io,
         last_id=1,
         requests=10,
+        max_requests=None,
+        transport="thread",
+        format=cmain.OutputFormat.TEXT,
+        checkpoint=None,
+        resume=False,
+        incremental=None,
+        budget_requests=None,
+        budget_time=None,
+        retries=0,
+        dead_letter=None,
+        ids=None,
+        id_space=None,
+        discover=False,
+        shard=None,
+        metrics=None,
+        metrics_interval=5.0,
+        summary=None,
+        rate=None,
+        burst=1,
+        rate_file=None,
+        fragment=False,
+        log_format=cmain.LogFormat.TEXT,
         output=StringIO("")
     )
     with does_not_raise():
@@ -32,3 +59,44 @@ def test_parse_main() -> None:
     with does_not_raise():
         pmain.parse(args)
 
+
+def crawl_args(mocker, *argv: str) -> argparse.Namespace:
+    mocker.patch("sys.argv", ["med-crawl", *argv])
+    return cmain.get_args()
+
+
+@pytest.mark.parametrize("fmt", ["text", "json", "sqlite"])
+def test_incremental_requires_lasting_output(mocker, tmp_path, fmt) -> None:
+    out = str(tmp_path / "out")
+    with pytest.raises(SystemExit):
+        crawl_args(mocker, "-o", out, "-f", fmt, "--incremental", "state")
+
+
+def test_incremental_appends(mocker, tmp_path) -> None:
+    out = tmp_path / "out.warc.gz"
+    snapshot = ArchiveSink(open(out, "wb"))
+    snapshot.put(1, WebContents("snapshot", 200))
+    snapshot.close()
+    before = out.read_bytes()
+    args = crawl_args(
+        mocker, "-o", str(out), "-f", "warc", "--incremental", "state"
+    )
+    cmain.open_sink(args, mocker.Mock()).close()
+    assert out.read_bytes() == before
+
+
+@pytest.mark.parametrize("shard", ["3/2", "abc", "0/4"])
+def test_bad_shard_is_usage_error(mocker, capsys, shard: str) -> None:
+    with pytest.raises(SystemExit) as exc:
+        crawl_args(mocker, "-o", "out", "--shard", shard)
+    assert exc.value.code == 2
+    assert "--shard" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("argv, attempts", [((), 4), (("--retries", "1"), 2)])
+def test_retries_follow_first_attempt(
+    mocker, tmp_path, argv, attempts
+) -> None:
+    crawler = mocker.patch.object(cmain, "Crawler")
+    cmain.crawl(crawl_args(mocker, "-o", str(tmp_path / "out"), *argv))
+    assert crawler.call_args.kwargs["retry"].attempts == attempts
@@ -0,0 +1,68 @@
+"""Tests of the crawler metrics and their exports."""
+
+# Standard library imports
+import io
+import json
+
+# Local library imports
+from med_crawler.crawler import crawler
+from med_crawler.crawler.metrics import Histogram, Metrics
+from med_crawler.crawler.retry import RetryPolicy
+from med_crawler import log
+
+from .server import MockMedServer, ServerConfig
+
+
+def test_histogram_buckets_and_quantiles() -> None:
+    h = Histogram((0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 2.0):
+        h.observe(value)
+    assert h.counts == [2, 1, 1]
+    assert h.quantile(0.5) == 0.1
+    assert 0.1 < h.quantile(0.75) <= 1.0
+    assert h.lines("x")[:3] == [
+        'x_bucket{le="0.1"} 2',
+        'x_bucket{le="1.0"} 3',
+        'x_bucket{le="+Inf"} 4',
+    ]
+    assert h.lines("x")[-1] == "x_count 4"
+
+
+def test_metrics_prometheus_text() -> None:
+    m = Metrics()
+    m.observe_response(0.02, 200, 100)
+    m.observe_response(0.03, 503, 0)
+    m.observe_error(1.0, TimeoutError())
+    m.observe_retry()
+    text = m.prometheus()
+    assert 'med_crawler_responses_total{code="503"} 1' in text
+    assert 'med_crawler_request_errors_total{error="TimeoutError"} 1' in text
+    assert "med_crawler_retries_total 1" in text
+    assert "med_crawler_downloaded_bytes_total 100" in text
+    assert "med_crawler_request_duration_seconds_count 3" in text
+    assert "# TYPE med_crawler_requests_in_flight gauge" in text
+
+
+def test_crawler_exports_metrics(tmp_path) -> None:
+    config = ServerConfig(last_id=20, error_rate=0.2, seed=3)
+    prom, summary = tmp_path / "crawl.prom", tmp_path / "summary.json"
+    metrics = Metrics(str(prom), str(summary), interval=0.01)
+    with MockMedServer(config) as s:
+        c = crawler.Crawler(
+            io.StringIO(),
+            log.CrawlerLogger(io.StringIO(), False),
+            config.last_id,
+            concurrent_requests=2,
+            url=s.url,
+            retry=RetryPolicy(attempts=10, base=0.001, cap=0.01),
+            metrics=metrics,
+        )
+        c.crawl()
+    result = json.loads(summary.read_text())
+    assert result["status_codes"]["200"] == 20
+    assert result["retries"] == result["status_codes"].get("503", 0) > 0
+    assert result["requests"] == s.stats.requests
+    assert result["bytes"] > 0
+    assert result["latency"]["p50"] > 0
+    assert metrics.in_flight == 0
+    assert "med_crawler_concurrency_limit" in prom.read_text()
@@ -0,0 +1,81 @@
+"""Tests of the dictionary entry model."""
+
+# Standard library imports
+import pickle
+
+# Third-party library imports
+import pytest
+
+# Local library imports
+from med_crawler.parser.parser import (
+    Citation,
+    Entry,
+    Etymology,
+    Form,
+    ParsingStrategy,
+    Pos,
+    Sense,
+    parse_single,
+)
+from .resp import entry_text
+
+
+@pytest.mark.parametrize("strategy", list(ParsingStrategy))
+def test_ids_are_stable(strategy: ParsingStrategy) -> None:
+    first = parse_single(entry_text, strategy).as_dict()
+    again = parse_single(entry_text, strategy).as_dict()
+    assert first == again
+    assert first["id"] == "MED1"
+    assert [f["id"] for f in first["forms"]] == [
+        "MED1.form.0",
+        "MED1.form.1",
+        "MED1.form.2",
+    ]
+    assert first["citations"][1]["id"] == "MED1.cit.1"
+
+
+def test_ids_unique_across_tables() -> None:
+    entry = parse_single(entry_text, ParsingStrategy.EVENTS)
+    parts: list[Pos | Etymology | Form | Sense | Citation] = [
+        *entry.pos,
+        *entry.etymologies,
+        *entry.forms,
+        *entry.senses,
+        *entry.citations,
+    ]
+    ids = [p.id for p in parts]
+    assert len(set(ids)) == len(ids)
+    assert entry.citations[0].as_dto(entry.id)["id"] == "MED1.cit.0"
+
+
+def test_entry_is_compact() -> None:
+    entry = parse_single(entry_text, ParsingStrategy.EVENTS)
+    for obj in (entry, entry.headword, entry.pos[0], entry.citations[0]):
+        assert not hasattr(obj, "__dict__")
+    copy = pickle.loads(pickle.dumps(entry))
+    assert copy == entry
+    assert copy.as_dict() == entry.as_dict()
+
+
+def test_categorical_fields_interned() -> None:
+    text = entry_text.replace("c1175", "a1400")
+    entry = parse_single(text, ParsingStrategy.EVENTS)
+    first, second = entry.citations
+    assert first.date is second.date
+    other = parse_single(text, ParsingStrategy.LXML)
+    assert entry.pos[0].code is other.pos[0].code
+
+
+def test_empty_citation_ignores_id() -> None:
+    entry = Entry(
+        "MED1",
+        parse_single(entry_text, ParsingStrategy.XPATH).headword,
+        [],
+        [],
+        [],
+        [],
+        [Citation("", "", "", "", "", "", ""), Citation(*"abcdefg")],
+    )
+    assert entry.citations[0].id == "MED1.cit.0"
+    assert entry.citations[0].is_empty()
+    assert [c["id"] for c in entry.as_dict()["citations"]] == ["MED1.cit.1"]
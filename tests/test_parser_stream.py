@@ -0,0 +1,165 @@
+"""Tests of streaming parsing of MED entries."""
+
+# Standard library imports
+import argparse
+import gzip
+import json
+import sqlite3
+
+# Local library imports
+from med_crawler.crawler.archive import ArchiveSink
+from med_crawler.crawler.transport import WebContents
+from med_crawler.parser import __main__ as pmain
+from med_crawler.parser.db import SqliteMedDB, entry_rows
+from med_crawler.parser.parser import Parser, ParsingStrategy, parse_single
+from med_crawler.parser.writer import entry_json
+from .resp import entry_text
+
+
+def entry(id: int) -> str:
+    return entry_text.replace('id="MED1"', f'id="MED{id}"')
+
+
+def test_iter_parse_texts_and_paths(tmp_path) -> None:
+    plain, packed = tmp_path / "MED2.html", tmp_path / "MED3.html.gz"
+    plain.write_text(entry(2))
+    packed.write_bytes(gzip.compress(entry(3).encode("utf-8")))
+    with Parser() as p:
+        entries = p.iter_parse([entry(1), plain, packed])
+        ids = sorted(e.source_id for e in entries)
+    assert ids == ["MED1", "MED2", "MED3"]
+
+
+def test_iter_parse_bounds_documents_in_flight() -> None:
+    drawn = 0
+
+    def documents():
+        nonlocal drawn
+        for id in range(1, 21):
+            drawn += 1
+            yield entry(id)
+
+    parsed, ids = 0, set()
+    with Parser(chunk_size=1) as p:
+        for e in p.iter_parse(documents(), max_pending=3):
+            parsed += 1
+            assert drawn - parsed <= 3
+            ids.add(e.source_id)
+    assert ids == {f"MED{id}" for id in range(1, 21)}
+
+
+def test_parse_still_returns_list() -> None:
+    with Parser(ParsingStrategy.html) as p:
+        entries = p.parse([entry(1), entry(2)])
+    assert isinstance(entries, list) and len(entries) == 2
+
+
+def test_parser_reuses_pool() -> None:
+    with Parser(processes=2) as p:
+        assert len(p.parse([entry(1)])) == 1
+        pool = p.pool
+        pids = set(pool._processes)  # type: ignore
+        assert len(p.parse([entry(2), entry(3)])) == 2
+        assert p.pool is pool
+        assert set(pool._processes) == pids  # type: ignore
+    assert p._pool is None
+
+
+def test_chunks_by_size() -> None:
+    p = Parser(processes=1, chunk_size=10)
+    chunks = list(p.chunks(iter(["a" * 4, "b" * 4, "c" * 4, "d" * 20, "e"])))
+    assert [len(c) for c in chunks] == [3, 1, 1]
+    sized = list(p.chunks(["a"] * 8))
+    assert [len(c) for c in sized] == [2, 2, 2, 2]
+
+
+def test_parse_main_streams_dir(tmp_path) -> None:
+    store = tmp_path / "store"
+    store.mkdir()
+    for id in range(1, 4):
+        (store / f"MED{id}.html").write_text(entry(id))
+    out = tmp_path / "out.json"
+    args = argparse.Namespace(
+        verbose=False,
+        input_dir=store,
+        input_archive=None,
+        input_records=None,
+        ids=None,
+        output=str(out),
+        format=pmain.OutputFormat.JSON,
+    )
+    pmain.parse(args)
+    result = json.loads(out.read_text())
+    assert sorted(e["source_id"] for e in result) == ["MED1", "MED2", "MED3"]
+
+
+def test_parse_main_archive_latest(tmp_path) -> None:
+    archive = tmp_path / "med.warc.gz"
+    sink = ArchiveSink(open(archive, "wb"))
+    for id in (1, 2, 1):
+        sink.put(id, WebContents(entry(id), 200))
+    sink.close()
+    out = tmp_path / "out.json"
+    args = argparse.Namespace(
+        verbose=False,
+        input_dir=None,
+        input_archive=archive,
+        input_records=None,
+        ids=None,
+        output=str(out),
+        format=pmain.OutputFormat.JSON,
+    )
+    pmain.parse(args)
+    result = json.loads(out.read_text())
+    assert sorted(e["source_id"] for e in result) == ["MED1", "MED2"]
+
+
+def test_iter_dump_serializes_in_workers() -> None:
+    with Parser(processes=1) as p:
+        dumped = list(p.iter_dump([entry(1), entry(2)], entry_json))
+        entries = p.parse([entry(1), entry(2)])
+    assert all(isinstance(d, str) for d in dumped)
+    assert sorted(json.loads(d)["id"] for d in dumped) == ["MED1", "MED2"]
+    assert sorted(dumped) == sorted(entry_json(e) for e in entries)
+
+
+def test_insert_rows_like_entries(tmp_path) -> None:
+    e1 = parse_single(entry(1), ParsingStrategy.lxml)
+    e2 = parse_single(entry(2), ParsingStrategy.lxml)
+    one, many = tmp_path / "one.db", tmp_path / "many.db"
+    with SqliteMedDB(str(one)) as db:
+        db.create_tables()
+        db.insert_entry(e1)
+        db.insert_entry(e2)
+    with SqliteMedDB(str(many)) as db:
+        db.create_tables()
+        db.insert_rows([entry_rows(e1), entry_rows(e2)])
+    for table in ("entry", "pos", "etymology", "form", "sense", "citation"):
+        query = f"SELECT * FROM {table} ORDER BY id;"
+        want = sqlite3.connect(one).execute(query).fetchall()
+        assert sqlite3.connect(many).execute(query).fetchall() == want
+
+
+def test_parse_main_sqlite(tmp_path) -> None:
+    store = tmp_path / "store"
+    store.mkdir()
+    for id in range(1, 4):
+        (store / f"MED{id}.html").write_text(entry(id))
+    out = tmp_path / "out.db"
+    args = argparse.Namespace(
+        verbose=False,
+        input_dir=store,
+        input_archive=None,
+        input_records=None,
+        ids=None,
+        output=str(out),
+        format=pmain.OutputFormat.SQLITE,
+    )
+    pmain.parse(args)
+    conn = sqlite3.connect(out)
+    assert conn.execute("SELECT id FROM entry ORDER BY id;").fetchall() == [
+        ("MED1",),
+        ("MED2",),
+        ("MED3",),
+    ]
+    assert conn.execute("SELECT count(*) FROM citation;").fetchone() == (6,)
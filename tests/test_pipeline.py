@@ -0,0 +1,136 @@
+"""Tests of the streaming crawl-to-parse pipeline."""
+
+# Standard library imports
+import concurrent.futures
+import json
+from io import StringIO
+from pathlib import Path
+import sqlite3
+
+# Local library imports
+from med_crawler import crawler
+from med_crawler import log
+from med_crawler.crawler.checkpoint import Checkpoint
+from med_crawler.crawler.retry import DeadLetter, read_ids
+from med_crawler.crawler.stats import CrawlStats, iter_events
+from med_crawler.crawler.transport import WebContents
+from med_crawler.parser.writer import JsonEntryWriter, SqliteEntryWriter
+from med_crawler.pipeline import ParsingSink
+from .resp import entry_text
+
+
+class EntryTransport:
+    async def get(self, url: str, headers=None) -> WebContents:
+        id = url.rsplit("MED", 1)[1]
+        if id == "3":
+            return WebContents("<html>no entry here</html>", 200)
+        return WebContents(entry_text.replace("MED1", f"MED{id}"), 200)
+
+    async def close(self) -> None:
+        return None
+
+
+def test_pipeline_json() -> None:
+    out, logs = StringIO(), StringIO()
+    sink = ParsingSink(
+        JsonEntryWriter(out),
+        processes=1,
+        max_pending=2,
+        logger=log.CrawlerLogger(logs, False),
+    )
+    c = crawler.Crawler(
+        sink, log.CrawlerLogger(logs, False), 6, transport=EntryTransport()
+    )
+    c.crawl()
+    have = json.loads(out.getvalue())
+    assert sorted(e["source_id"] for e in have) == [
+        f"MED{id}" for id in (1, 2, 4, 5, 6)
+    ]
+    assert "failed to parse MED3" in logs.getvalue()
+
+
+def test_pipeline_parse_failure_is_recorded(tmp_path: Path) -> None:
+    logs, dead = StringIO(), StringIO()
+    with log.JsonLogger(logs) as logger, Checkpoint(
+        str(tmp_path / "checkpoint")
+    ) as checkpoint:
+        sink = ParsingSink(JsonEntryWriter(StringIO()), processes=1)
+        sink.logger = logger
+        c = crawler.Crawler(
+            sink,
+            logger,
+            4,
+            transport=EntryTransport(),
+            checkpoint=checkpoint,
+            dead_letter=DeadLetter(dead),
+        )
+        sink.on_failure = c.fail
+        c.crawl()
+        assert list(checkpoint.pending(range(1, 5))) == [3]
+    assert list(read_ids(StringIO(dead.getvalue()))) == [3]
+    events = list(iter_events(logs.getvalue().splitlines()))
+    [failed] = [e for e in events if e["event"] == "parse_failed"]
+    assert failed["id"] == 3
+    stats = CrawlStats()
+    for event in events:
+        stats.feed(event)
+    assert list(stats.failed) == [3]
+
+
+def test_pipeline_flush_does_not_wait() -> None:
+    failed: list[int] = []
+    sink = ParsingSink(
+        JsonEntryWriter(StringIO()),
+        processes=1,
+        on_failure=lambda id, _: failed.append(id),
+    )
+    parse: concurrent.futures.Future[str] = concurrent.futures.Future()
+    sink.pending.append((7, parse))
+    sink.flush()
+    assert sink.unwritten() == {7}
+    parse.set_exception(ValueError("no entry"))
+    sink.close()
+    assert not sink.unwritten()
+    assert failed == [7]
+
+
+def test_pipeline_sqlite(tmp_path: Path) -> None:
+    file_name = str(tmp_path / "med.db")
+    sink = ParsingSink(SqliteEntryWriter(file_name), processes=1)
+    c = crawler.Crawler(
+        sink,
+        log.CrawlerLogger(StringIO(), False),
+        2,
+        transport=EntryTransport(),
+    )
+    c.crawl()
+    conn = sqlite3.connect(file_name)
+    assert conn.execute("SELECT count(*) FROM entry;").fetchone() == (2,)
+    assert conn.execute("SELECT count(*) FROM citation;").fetchone() == (4,)
+
+
+class DuplicateTransport(EntryTransport):
+    async def get(self, url: str, headers=None) -> WebContents:
+        if url.endswith("MED5"):
+            url = url.replace("MED5", "MED2")
+        return await super().get(url, headers)
+
+
+def test_pipeline_sqlite_skips_duplicate(tmp_path: Path) -> None:
+    file_name = str(tmp_path / "med.db")
+    writer = SqliteEntryWriter(file_name)
+    sink = ParsingSink(writer, processes=1)
+    c = crawler.Crawler(
+        sink,
+        log.CrawlerLogger(StringIO(), False),
+        10,
+        transport=DuplicateTransport(),
+    )
+    c.crawl()
+    conn = sqlite3.connect(file_name)
+    ids = conn.execute("SELECT source_id FROM entry ORDER BY id;").fetchall()
+    assert sorted(id for id, in ids) == sorted(
+        f"MED{id}" for id in (1, 2, 4, 6, 7, 8, 9, 10)
+    )
+    assert conn.execute("SELECT count(*) FROM citation;").fetchone() == (16,)
+    assert writer.skipped == ["MED2"]
@@ -0,0 +1,64 @@
+"""Tests of the token-bucket request rate limit."""
+
+# Standard library imports
+import io
+import time
+
+# Third-party library imports
+import pytest
+
+# Local library imports
+from med_crawler.crawler import crawler
+from med_crawler.crawler.ratelimit import RateLimitException, TokenBucket
+from med_crawler import log
+
+from .server import MockMedServer, ServerConfig
+
+
+def test_bucket_burst_then_rate(mocker) -> None:
+    b = TokenBucket(rate=10, burst=3)
+    mocker.patch.object(b, "clock", return_value=100.0)
+    assert [b.reserve() for _ in range(5)] == pytest.approx(
+        [0, 0, 0, 0.1, 0.2]
+    )
+
+
+def test_bucket_refills_while_idle(mocker) -> None:
+    b = TokenBucket(rate=10, burst=2)
+    clock = mocker.patch.object(b, "clock", return_value=100.0)
+    for _ in range(4):
+        b.reserve()
+    clock.return_value = 101.0
+    assert [b.reserve() for _ in range(3)] == pytest.approx([0, 0, 0.1])
+
+
+def test_bucket_shared_through_file(tmp_path) -> None:
+    file_name = str(tmp_path / "rate")
+    with TokenBucket(1, 2, file_name) as a, TokenBucket(1, 2, file_name) as b:
+        assert a.reserve() == 0
+        assert b.reserve() == 0
+        assert b.reserve() == pytest.approx(1, abs=0.05)
+        assert a.reserve() == pytest.approx(2, abs=0.05)
+
+
+def test_bucket_rejects_bad_rate() -> None:
+    with pytest.raises(RateLimitException):
+        TokenBucket(0)
+
+
+def test_crawler_respects_rate() -> None:
+    with MockMedServer(ServerConfig(last_id=11)) as s:
+        c = crawler.Crawler(
+            io.StringIO(),
+            log.CrawlerLogger(io.StringIO(), False),
+            11,
+            concurrent_requests=8,
+            url=s.url,
+            rate_limit=TokenBucket(rate=50, burst=1),
+        )
+        start = time.monotonic()
+        c.crawl()
+        elapsed = time.monotonic() - start
+    assert s.stats.requests == 11
+    assert elapsed >= 10 / 50
+    assert c.metrics.rate_wait.count == 11
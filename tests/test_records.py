@@ -0,0 +1,152 @@
+"""Tests of the framed, indexed crawl record format."""
+
+# Standard library imports
+from io import StringIO
+import os
+import subprocess
+import sys
+
+# Third-party library imports
+import pytest
+
+# Local library imports
+from med_crawler import crawler
+from med_crawler import log
+from med_crawler.crawler.merge import merge_records
+from med_crawler.crawler.records import (
+    RecordException,
+    RecordFile,
+    RecordSink,
+    iter_records,
+)
+from med_crawler.crawler.transport import WebContents
+from .test_pipeline import EntryTransport
+
+
+def write(path, pages, append=False) -> None:
+    sink = RecordSink(path, append=append)
+    for id, text in pages:
+        sink.put(id, WebContents(text, 200))
+    sink.close()
+
+
+def test_random_access(tmp_path) -> None:
+    path = tmp_path / "out.rec"
+    write(path, [(3, "three"), (1, "one ā"), (7, "seven")])
+    with RecordFile(path) as records:
+        assert records[1].text == "one ā"
+        assert records[7].text == "seven"
+        assert 2 not in records and 100 not in records
+        assert list(records.ids()) == [1, 3, 7]
+        with pytest.raises(KeyError):
+            records[2]
+
+
+def test_later_records_win(tmp_path) -> None:
+    path = tmp_path / "out.rec"
+    write(path, [(1, "old"), (2, "two")])
+    write(path, [(1, "new")], append=True)
+    with RecordFile(path) as records:
+        assert records[1].text == "new"
+    assert [r.text for r in iter_records(path)] == ["old", "two", "new"]
+    assert [r.text for r in iter_records(path, latest=True)] == [
+        "two",
+        "new",
+    ]
+
+
+def test_split_reads_every_record_once(tmp_path) -> None:
+    path = tmp_path / "out.rec"
+    write(path, [(id, "x" * id) for id in range(1, 50)])
+    with RecordFile(path) as records:
+        ranges = records.split(4)
+    assert len(ranges) == 4
+    assert ranges[0][0] == 0 and ranges[-1][1] == os.path.getsize(path)
+    ids = [
+        r.id for start, end in ranges for r in iter_records(path, start, end)
+    ]
+    assert ids == list(range(1, 50))
+
+
+def test_append_cuts_partial_record(tmp_path) -> None:
+    path = tmp_path / "out.rec"
+    write(path, [(1, "one"), (2, "two")])
+    with open(path, "ab") as f:
+        f.write(b"MEDR\x03\x00")
+    write(path, [(3, "three")], append=True)
+    assert [r.id for r in iter_records(path)] == [1, 2, 3]
+
+
+def test_resume_after_kill(tmp_path) -> None:
+    path = tmp_path / "out.rec"
+    code = (
+        "import os, sys\n"
+        "from med_crawler.crawler.records import RecordSink\n"
+        "from med_crawler.crawler.transport import WebContents\n"
+        "sink = RecordSink(sys.argv[1], pending_slots=4)\n"
+        "for id in range(1, 11):\n"
+        "    sink.put(id, WebContents(f'page {id}', 200))\n"
+        "os._exit(0)\n"
+    )
+    subprocess.run([sys.executable, "-c", code, str(path)], check=True)
+    write(path, [(11, "page 11")], append=True)
+    with RecordFile(path) as records:
+        ids = list(records.ids())
+        assert ids[-1] == 11
+        assert all(records[id].text == f"page {id}" for id in ids)
+    assert [r.id for r in iter_records(path)] == ids
+
+
+def test_resume_with_index_past_data(tmp_path) -> None:
+    path = tmp_path / "out.rec"
+    write(path, [(1, "one"), (2, "two"), (3, "three")])
+    size = len("one") + 16
+    with open(path, "r+b") as f:
+        f.truncate(size + 5)
+    write(path, [(4, "four")], append=True)
+    assert [r.id for r in iter_records(path)] == [1, 4]
+    with RecordFile(path) as records:
+        assert list(records.ids()) == [1, 4]
+    os.truncate(path, 0)
+    write(path, [(5, "five")], append=True)
+    assert [r.text for r in iter_records(path)] == ["five"]
+    with RecordFile(path) as records:
+        assert list(records.ids()) == [5]
+
+
+def test_corrupt_record(tmp_path) -> None:
+    path = tmp_path / "out.rec"
+    write(path, [(1, "one")])
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(RecordException):
+        list(iter_records(path))
+
+
+def test_merge_records(tmp_path) -> None:
+    a, b, out = tmp_path / "a", tmp_path / "b", tmp_path / "out"
+    write(a, [(1, "one"), (3, "old")])
+    write(a, [(3, "three")], append=True)
+    write(b, [(2, "two")])
+    merge_records([a, b], str(out))
+    with RecordFile(out) as records:
+        assert [records[id].text for id in records.ids()] == [
+            "one",
+            "two",
+            "three",
+        ]
+
+
+def test_crawler_writes_records(tmp_path) -> None:
+    path = tmp_path / "out.rec"
+    c = crawler.Crawler(
+        RecordSink(path),
+        log.CrawlerLogger(StringIO(), False),
+        4,
+        transport=EntryTransport(),
+    )
+    c.crawl()
+    with RecordFile(path) as records:
+        assert sorted(records.ids()) == [1, 2, 3, 4]
+        assert 'id="MED4"' in records[4].text
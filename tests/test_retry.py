@@ -0,0 +1,100 @@
+"""Tests of crawl retries and the dead-letter file."""
+
+# Standard library imports
+from io import StringIO
+
+# Third-party library imports
+import pytest
+
+# Local library imports
+from med_crawler import crawler
+from med_crawler import log
+from med_crawler.crawler.retry import DeadLetter, RetryPolicy, read_ids
+from med_crawler.crawler.transport import WebContents
+
+
+class FlakyTransport:
+    def __init__(self, failures: dict[int, list]) -> None:
+        self.failures = failures
+        self.calls: list[int] = []
+
+    async def get(self, url: str, headers=None) -> WebContents:
+        id = int(url.rsplit("MED", 1)[1])
+        self.calls.append(id)
+        if self.failures.get(id):
+            failure = self.failures[id].pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return failure
+        return WebContents(f"MED{id}", 200)
+
+    async def close(self) -> None:
+        return None
+
+
+@pytest.mark.parametrize("attempt", [0, 1, 5, 20])
+def test_retry_delay_bounds(attempt: int) -> None:
+    p = RetryPolicy(base=0.5, cap=4.0)
+    assert 0 <= p.delay(attempt) <= min(4.0, 0.5 * 2**attempt)
+
+
+def test_retry_after() -> None:
+    p = RetryPolicy(max_retry_after=10)
+    assert p.delay(0, "3") == 3
+    assert p.delay(0, "3600") == 10
+    assert p.delay(0, "Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert p.delay(0, "soon") <= p.base
+
+
+def test_crawler_retries_transient_failures() -> None:
+    t = FlakyTransport(
+        {
+            1: [ConnectionResetError(), WebContents("", 503)],
+            2: [WebContents("", 429, {"Retry-After": "0"})],
+        }
+    )
+    out, dead = StringIO(), StringIO()
+    c = crawler.Crawler(
+        out,
+        log.CrawlerLogger(StringIO(), False),
+        2,
+        transport=t,
+        retry=RetryPolicy(base=0.001),
+        dead_letter=DeadLetter(dead),
+    )
+    c.crawl()
+    assert sorted(t.calls) == [1, 1, 1, 2, 2]
+    assert sorted(out.getvalue().split("MED")) == ["", "1", "2"]
+    assert dead.getvalue() == ""
+
+
+def test_crawler_dead_letters_persistent_failures() -> None:
+    t = FlakyTransport(
+        {
+            1: [WebContents("", 503)] * 3,
+            2: [TimeoutError()] * 3,
+            3: [WebContents("", 404)],
+        }
+    )
+    dead = StringIO()
+    c = crawler.Crawler(
+        StringIO(),
+        log.CrawlerLogger(StringIO(), False),
+        4,
+        transport=t,
+        retry=RetryPolicy(attempts=3, base=0.001),
+        dead_letter=DeadLetter(dead),
+    )
+    c.crawl()
+    assert t.calls.count(1) == 3
+    assert t.calls.count(3) == 1
+    dead.seek(0)
+    assert sorted(read_ids(dead)) == [1, 2]
+
+
+def test_read_ids() -> None:
+    assert list(read_ids(StringIO("1\t503\n\nMED20\n7 TimeoutError()\n"))) == [
+        1,
+        20,
+        7,
+    ]
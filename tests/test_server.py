@@ -0,0 +1,70 @@
+# Standard library imports
+import io
+
+# Local library imports
+from med_crawler.crawler import crawler
+from med_crawler.crawler.checkpoint import Checkpoint, EntryStatus
+from med_crawler.crawler.retry import RetryPolicy
+from med_crawler.crawler.transport import TransportKind, fetch_sync
+from med_crawler import log
+
+from . import bench
+from .server import MockMedServer, ServerConfig
+
+
+def test_server_serves_entries_and_gaps() -> None:
+    with MockMedServer(ServerConfig(last_id=3, gaps=frozenset({2}))) as s:
+        assert fetch_sync(s.url + "MED1").status_code == 200
+        assert "doc_med3" in fetch_sync(s.url + "MED3").text
+        assert fetch_sync(s.url + "MED2").status_code == 404
+        assert fetch_sync(s.url + "MED4").status_code == 404
+    assert s.stats.requests == 4
+
+
+def test_server_rate_limits() -> None:
+    config = ServerConfig(rate_limit=1.0, burst=2, retry_after=7)
+    with MockMedServer(config) as s:
+        codes = [fetch_sync(s.url + f"MED{i}").status_code for i in (1, 2, 3)]
+        resp = fetch_sync(s.url + "MED4")
+    assert codes == [200, 200, 429]
+    assert resp.headers["Retry-After"] == "7"
+
+
+def test_crawler_against_server(tmp_path) -> None:
+    config = ServerConfig(
+        last_id=40, gaps=frozenset({10, 20}), error_rate=0.1, seed=1
+    )
+    out = io.StringIO()
+    with (
+        MockMedServer(config) as s,
+        Checkpoint(str(tmp_path / "c.db")) as checkpoint,
+    ):
+        c = crawler.Crawler(
+            out,
+            log.CrawlerLogger(io.StringIO(), False),
+            config.last_id,
+            concurrent_requests=4,
+            transport=bench.TimedTransport(
+                bench.make_transport(TransportKind.AUTO, 8)
+            ),
+            checkpoint=checkpoint,
+            retry=RetryPolicy(attempts=10, base=0.001, cap=0.01),
+            url=s.url,
+        )
+        c.crawl()
+        missing = checkpoint.ids(EntryStatus.MISSING)
+        ok = checkpoint.ids(EntryStatus.OK)
+    assert missing == {10, 20}
+    assert len(ok) == 38
+    assert s.stats.status_codes.get(503, 0) > 0
+    assert s.stats.peak_in_flight > 1
+
+
+def test_bench_run_reports() -> None:
+    with MockMedServer(ServerConfig(last_id=20)) as s:
+        result = bench.run(s, concurrency=2)
+    assert result.pages == result.requests == 20
+    assert result.pages_per_sec > 0
+    assert 0 < result.p50 <= result.p95 <= result.p99
+    assert result.peak_memory > 0
+    assert str(result).split()[0] == "2"
@@ -0,0 +1,84 @@
+"""Tests of sharded crawling and merging shard outputs."""
+
+# Standard library imports
+import argparse
+from io import StringIO
+import json
+from pathlib import Path
+
+# Third-party library imports
+import pytest
+
+# Local library imports
+from med_crawler import crawler
+from med_crawler import log
+from med_crawler.crawler import __main__ as cmain
+from med_crawler.crawler.archive import ArchiveSink, iter_archive
+from med_crawler.crawler.checkpoint import Checkpoint
+from med_crawler.crawler.shard import Shard, ShardException
+from med_crawler.crawler.transport import WebContents
+
+
+class IdTransport:
+    async def get(self, url: str, headers=None) -> WebContents:
+        return WebContents(url.rsplit("/", 1)[1] + "\n", 200)
+
+    async def close(self) -> None:
+        return None
+
+
+def test_shard_partition() -> None:
+    shards = [Shard.parse(f"{k}/3") for k in (1, 2, 3)]
+    parts = [list(s.filter(range(1, 101))) for s in shards]
+    assert sorted(sum(parts, [])) == list(range(1, 101))
+    assert all(32 <= len(p) <= 34 for p in parts)
+    assert shards[0].budget(5) == 1
+    assert shards[0].budget(20) == 6
+
+
+@pytest.mark.parametrize("value", ["0/3", "4/3", "1", "a/b"])
+def test_shard_parse_invalid(value: str) -> None:
+    with pytest.raises(ShardException):
+        Shard.parse(value)
+
+
+def test_merge_sharded_archives(tmp_path: Path) -> None:
+    inputs = []
+    for k in (1, 2):
+        path = tmp_path / f"shard{k}.warc.gz"
+        with Checkpoint(f"{path}.checkpoint") as checkpoint:
+            crawler.Crawler(
+                ArchiveSink(open(path, "wb")),
+                log.CrawlerLogger(StringIO(), False),
+                30,
+                transport=IdTransport(),
+                checkpoint=checkpoint,
+                shard=Shard(k, 2),
+            ).crawl()
+        inputs.append(str(path))
+    output = tmp_path / "med.warc.gz"
+    cmain.merge(
+        argparse.Namespace(
+            inputs=inputs, output=str(output), format=cmain.OutputFormat.WARC
+        )
+    )
+    assert [r.id for r in iter_archive(output)] == list(range(1, 31))
+    assert [r.text for r in iter_archive(output)][:2] == ["MED1\n", "MED2\n"]
+    with Checkpoint(f"{output}.checkpoint") as checkpoint:
+        assert list(checkpoint.pending(range(1, 32))) == [31]
+
+
+def test_merge_json(tmp_path: Path) -> None:
+    inputs = []
+    for k, ids in enumerate(([2, 4], [1, 3])):
+        path = tmp_path / f"shard{k}.json"
+        path.write_text(json.dumps([{"source_id": f"MED{i}"} for i in ids]))
+        inputs.append(str(path))
+    output = tmp_path / "med.json"
+    cmain.merge(
+        argparse.Namespace(
+            inputs=inputs, output=str(output), format=cmain.OutputFormat.JSON
+        )
+    )
+    have = [e["source_id"] for e in json.loads(output.read_text())]
+    assert have == ["MED1", "MED2", "MED3", "MED4"]
@@ -0,0 +1,75 @@
+"""Tests of the crawler output sinks."""
+
+# Standard library imports
+from io import StringIO
+from pathlib import Path
+import subprocess
+import sys
+
+# Local library imports
+from med_crawler.crawler.sink import DirectorySink, StreamSink
+from med_crawler.crawler.transport import WebContents
+from med_crawler.store import iter_store, read_entry
+from .resp import resp_text
+
+
+def test_stream_sink() -> None:
+    out = StringIO()
+    s = StreamSink(out)
+    s.put(1, WebContents("a", 200))
+    s.put(2, WebContents("b", 200))
+    assert out.getvalue() == "ab"
+
+
+def test_directory_sink_layout(tmp_path: Path) -> None:
+    s = DirectorySink(tmp_path, bucket_size=10)
+    s.put(1, WebContents(resp_text, 200))
+    s.put(12, WebContents("<html/>", 200))
+    have = [p.relative_to(tmp_path) for p in iter_store(tmp_path)]
+    assert [p.parent.name for p in have] == ["0000", "0001"]
+    assert have[0].name.startswith("MED1.")
+    assert have[1].name.startswith("MED12.")
+    assert read_entry(tmp_path / have[0]) == resp_text
+
+
+def test_directory_sink_skips_unchanged(tmp_path: Path) -> None:
+    DirectorySink(tmp_path).put(1, WebContents("old", 200))
+    (path,) = iter_store(tmp_path)
+    mtime = path.stat().st_mtime_ns
+    s = DirectorySink(tmp_path)
+    s.put(1, WebContents("old", 200))
+    assert path.stat().st_mtime_ns == mtime
+    s.put(1, WebContents("new", 200))
+    (changed,) = iter_store(tmp_path)
+    assert changed != path
+    assert read_entry(changed) == "new"
+
+
+def test_directory_sink_compress(tmp_path: Path) -> None:
+    s = DirectorySink(tmp_path, compress=True)
+    s.put(7, WebContents(resp_text, 200))
+    (path,) = iter_store(tmp_path)
+    assert path.name.endswith(".html.gz")
+    assert path.stat().st_size < len(resp_text)
+    assert read_entry(path) == resp_text
+
+
+def test_iter_store_lists_buckets_lazily(tmp_path: Path) -> None:
+    s = DirectorySink(tmp_path, bucket_size=10)
+    s.put(1, WebContents("one", 200))
+    s.put(12, WebContents("twelve", 200))
+    files = iter_store(tmp_path)
+    assert next(files).name.startswith("MED1.")
+    s.put(13, WebContents("thirteen", 200))
+    assert [read_entry(p) for p in files] == ["twelve", "thirteen"]
+
+
+def test_parser_does_not_import_crawler() -> None:
+    code = (
+        "import sys, med_crawler.parser.parser; "
+        "print('med_crawler.crawler' in sys.modules)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True
+    )
+    assert out.stdout.strip() == "False"
@@ -0,0 +1,92 @@
+"""Tests of structured crawl logs and their analysis."""
+
+# Standard library imports
+import argparse
+from io import StringIO
+import json
+
+# Local library imports
+from med_crawler.crawler import __main__ as cmain
+from med_crawler.crawler import crawler
+from med_crawler.crawler.retry import RetryPolicy, read_ids
+from med_crawler.crawler.stats import CrawlStats, iter_events
+from med_crawler import log
+
+from .server import MockMedServer, ServerConfig
+
+
+def crawl_log(config: ServerConfig, attempts: int = 1) -> str:
+    out = StringIO()
+    with MockMedServer(config) as s, log.JsonLogger(out) as logger:
+        c = crawler.Crawler(
+            StringIO(),
+            logger,
+            config.last_id,
+            url=s.url,
+            retry=RetryPolicy(attempts=attempts, base=0.001, cap=0.01),
+        )
+        c.crawl()
+    return out.getvalue()
+
+
+def test_json_logger_fields() -> None:
+    lines = crawl_log(ServerConfig(last_id=3, gaps=frozenset({2})))
+    events = [json.loads(line) for line in lines.splitlines()]
+    crawled = [e for e in events if e["event"] == "crawled"]
+    assert sorted(e["id"] for e in crawled) == [1, 3]
+    assert crawled[0]["status"] == 200
+    assert crawled[0]["attempt"] == 1
+    assert crawled[0]["bytes"] > 0
+    assert crawled[0]["latency"] > 0
+    assert crawled[0]["msg"].startswith("crawled MED")
+    [failed] = [e for e in events if e["event"] == "failed"]
+    assert (failed["id"], failed["status"]) == (2, 404)
+    assert [e["n"] for e in events] == list(range(len(events)))
+
+
+def test_crawl_stats() -> None:
+    config = ServerConfig(last_id=30, gaps=frozenset({5}), error_rate=0.3)
+    s = CrawlStats(interval=3600)
+    for event in iter_events(crawl_log(config).splitlines()):
+        assert s.feed(event) is None
+    window = s.finish()
+    assert s.missing == 1
+    assert s.events["crawled"] + len(s.failed) == 29
+    assert all(reason == "status code 503" for reason in s.failed.values())
+    assert window is not None and window.pages == s.events["crawled"]
+    assert s.latency.count == 30
+
+
+def test_crawl_stats_windows_and_recovery() -> None:
+    events = [
+        {"event": "failed", "id": 1, "status": 500, "time": 0.0},
+        {"event": "crawled", "id": 2, "bytes": 10, "time": 1.0},
+        {"event": "crawled", "id": 1, "bytes": 10, "time": 12.0},
+        {"event": "error", "id": 3, "error": "TimeoutError()", "time": 25},
+    ]
+    s = CrawlStats(interval=10)
+    closed = [w for e in events if (w := s.feed(e)) is not None]
+    assert [(w.start, w.pages, w.failures) for w in closed] == [
+        (0.0, 1, 1),
+        (10.0, 1, 0),
+    ]
+    assert s.failed == {3: "TimeoutError()"}
+    assert s.elapsed == 25
+
+
+def test_stats_main(tmp_path) -> None:
+    log_file = tmp_path / "crawl.log"
+    log_file.write_text(
+        "0::OK::crawled MED1\n"
+        + json.dumps({"event": "failed", "id": 7, "status": 503, "time": 1})
+        + "\n"
+    )
+    failed = tmp_path / "failed"
+    out = StringIO()
+    args = argparse.Namespace(
+        log=open(log_file), interval=60.0, failed=open(failed, "w")
+    )
+    cmain.stats(args, out)
+    assert "failed: 1" in out.getvalue()
+    with open(failed) as f:
+        assert list(read_ids(f)) == [7]
@@ -0,0 +1,81 @@
+"""Differential tests of the XPath strategy against the soup extractor."""
+
+# Third-party library imports
+import pytest
+
+# Local library imports
+from med_crawler.parser.parser import (
+    Parser,
+    ParsingException,
+    ParsingStrategy,
+    parse_single,
+)
+from .resp import entry_text, resp_text
+
+
+body = entry_text.split("\n", 1)[1]
+extra_cits = "".join(
+    f"<cit><bibl><stncl rid='R{n}'><date>a{1300 + n}</date></stncl></bibl>"
+    f"<q>line  {n} &amp;\n <hi>more</hi> |{n}|</q></cit>"
+    for n in range(50)
+)
+
+corpus = {
+    "entry": entry_text,
+    "page": resp_text.replace("</body>", f"{body}</body>"),
+    "no declaration": body,
+    "no etymology": entry_text.replace(
+        '<etym><lang><lg expan="Old English">OE</lg></lang></etym>', ""
+    ),
+    "no original": entry_text.replace("<orig>a</orig>", ""),
+    "lg without expan": entry_text.replace(' expan="Old English"', ""),
+    "lang without lg": entry_text.replace("</lang>", "</lang><lang/>"),
+    "cit without stncl": entry_text.replace(
+        '<stncl rid="HYP.1.2">', "<x>"
+    ).replace("</stncl>\n          <ms>(Dc 1)", "</x>\n          <ms>(Dc 1)"),
+    "several senses": entry_text.replace(
+        "<def>", "<def>Second <hi>sense</hi>;</def><def>"
+    ),
+    "many citations": entry_text.replace("</eg>", f"{extra_cits}</eg>"),
+    "upper case": entry_text.replace("<cit>", "<CIT>").replace(
+        "</cit>", "</CIT>"
+    ),
+    "comments": entry_text.replace("<q>", "<q><!-- a note -->"),
+}
+
+
+def without_ids(value):
+    if isinstance(value, dict):
+        return {k: without_ids(v) for k, v in value.items() if k != "id"}
+    if isinstance(value, list):
+        return [without_ids(v) for v in value]
+    return value
+
+
+@pytest.mark.parametrize("name", list(corpus))
+def test_xpath_matches_soup(name: str) -> None:
+    text = corpus[name]
+    want = parse_single(text, ParsingStrategy.LXML).as_dict()
+    got = parse_single(text, ParsingStrategy.XPATH).as_dict()
+    assert without_ids(got) == without_ids(want)
+
+
+def test_xpath_extracts_entry() -> None:
+    entry = parse_single(entry_text, ParsingStrategy.XPATH)
+    assert entry.source_id == "MED1"
+    assert [f.regular for f in entry.forms] == ["ā", "ā", "aa"]
+    assert entry.citations[0].text == (
+        "Þe firrste staff iss nemmnedd A Onn ure Latin spæche."
+    )
+    assert entry.citations[1].reference == "HYP.1.2"
+
+
+def test_xpath_rejects_pages_without_entry() -> None:
+    with pytest.raises(ParsingException):
+        parse_single(resp_text, ParsingStrategy.XPATH)
+
+
+def test_xpath_in_pool() -> None:
+    with Parser(ParsingStrategy.XPATH, processes=1) as p:
+        entries = p.parse([entry_text, body])
+    assert [e.source_id for e in entries] == ["MED1", "MED1"]